@@ -0,0 +1 @@
+"""Benchmarks of the ZCS Azzurro integration."""
@@ -0,0 +1,119 @@
+"""Portal responses used by the benchmarks.
+
+Responses are generated with the shape of the ones recorded from ZCS Azzurro
+portal, with a sample every 5 minutes and a bell-shaped solar curve, so that
+any number of things and hours can be benchmarked without real credentials.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import math
+
+from custom_components.zcsazzurro.api import _command_id
+
+SAMPLE_INTERVAL = timedelta(minutes=5)
+PEAK_POWER = 6000.0
+
+# name: (number of things, hours of historic data)
+SIZES = {
+    "1x8h": (1, 8),
+    "50x24h": (50, 24),
+}
+
+
+def thing_keys(things: int) -> list[str]:
+    """Return the thing keys of a simulated fleet."""
+    return [f"ZA1ES{idx:07d}" for idx in range(things)]
+
+
+def solar_power(ts: datetime, peak: float = PEAK_POWER) -> float:
+    """Return the power generated at a time of day on a clear day."""
+    hour = ts.hour + ts.minute / 60
+    if not 6 <= hour <= 20:
+        return 0.0
+    return round(peak * math.sin(math.pi * (hour - 6) / 14) ** 2, 1)
+
+
+def realtime_data(thing_key: str, now: datetime, peak: float = PEAK_POWER) -> dict:
+    """Return the real-time data of a thing."""
+    power = solar_power(now, peak)
+    return {
+        "lastUpdate": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "thingFind": "2021-04-12T09:30:00Z",
+        "powerGenerating": power,
+        "energyGenerating": 18.4,
+        "energyGeneratingTotal": 12873.2,
+        "powerConsuming": 450.0,
+        "energyConsuming": 7.1,
+        "energyConsumingTotal": 5102.9,
+        "powerAutoconsuming": min(power, 450.0),
+        "energyAutoconsuming": 5.3,
+        "energyAutoconsumingTotal": 3921.4,
+        "powerCharging": 0.0,
+        "energyCharging": 2.2,
+        "energyChargingTotal": 1810.0,
+        "powerDischarging": 0.0,
+        "energyDischarging": 1.9,
+        "energyDischargingTotal": 1640.5,
+        "powerImporting": 0.0,
+        "energyImporting": 1.8,
+        "energyImportingTotal": 1181.5,
+        "powerExporting": max(power - 450.0, 0.0),
+        "energyExporting": 11.0,
+        "energyExportingTotal": 7920.3,
+        "batterySoC": 87,
+        "batterySoC2": None,
+        "batteryCycletime": {"battery1": 312, "battery2": None},
+        "alarms": {"count": 0, "last": {"code": None, "ts": None}},
+    }
+
+
+def historic_data(thing_key: str, now: datetime, hours: int) -> dict:
+    """Return the historic data arrays of a thing for the last hours."""
+    return historic_data_between(thing_key, now - timedelta(hours=hours), now)
+
+
+def historic_data_between(
+    thing_key: str, start: datetime, end: datetime, peak: float = PEAK_POWER
+) -> dict:
+    """Return the historic data arrays of a thing between two dates."""
+    samples = int((end - start) / SAMPLE_INTERVAL)
+    data: dict[str, list] = {
+        "ts": [],
+        "currentDC": [],
+        "voltageDC": [],
+        "powerDC": [],
+        "temperature": [],
+        "energyGeneratingTotal": [],
+        "energyGenerating": [],
+        "powerGenerating": [],
+    }
+    energy_total = 12855.0
+    for idx in range(samples):
+        ts = end - SAMPLE_INTERVAL * (samples - idx - 1)
+        power = solar_power(ts, peak)
+        energy_total += power * SAMPLE_INTERVAL.total_seconds() / 3600000
+        data["ts"].append(ts.strftime("%Y-%m-%dT%H:%M:%SZ"))
+        data["currentDC"].append(round(power / 380, 2))
+        data["voltageDC"].append(380.0 if power else 0.0)
+        data["powerDC"].append(round(power * 1.03, 1))
+        data["temperature"].append(25.0 + power / 300)
+        data["energyGeneratingTotal"].append(round(energy_total, 2))
+        data["energyGenerating"].append(18.4)
+        data["powerGenerating"].append(power)
+    return data
+
+
+def portal_response(things: int, hours: int, now: datetime) -> dict:
+    """Return the decoded portal response for a fleet of things."""
+    response = {}
+    for thing_key in thing_keys(things):
+        response[_command_id("historicData", thing_key, things > 1)] = {
+            "command": "historicData",
+            "params": {"value": [{thing_key: historic_data(thing_key, now, hours)}]},
+        }
+        response[_command_id("realtimeData", thing_key, things > 1)] = {
+            "command": "realtimeData",
+            "params": {"value": [{thing_key: realtime_data(thing_key, now)}]},
+        }
+    return response
@@ -0,0 +1,89 @@
+"""Memory taken by the sensors of ZCS Azzurro devices.
+
+Run from the repository root, with Home Assistant installed:
+
+    python3 -m benchmarks.memory [--json results.json]
+
+For each fleet size of fixtures.SIZES, the sensors of every device are
+created and rendered once, like on their first state write, and the memory
+they allocated is traced with tracemalloc. The data fetched from the portal
+is allocated before tracing starts, as it is needed in any case.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import tempfile
+import tracemalloc
+
+from custom_components.zcsazzurro.sensor import SENSOR_TYPES, ZCSSensor
+from homeassistant.core import HomeAssistant
+
+from . import fixtures
+from .run import _coordinators
+
+
+async def measure(hass: HomeAssistant, things: int, hours: int) -> int:
+    """Return the bytes allocated by the rendered sensors of a fleet."""
+    coordinators = await _coordinators(hass, things, hours)
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+
+    entities = []
+    for thing_key, coordinator in coordinators.items():
+        for definition in SENSOR_TYPES:
+            entity = ZCSSensor(coordinator, 0, thing_key, definition.description)
+            _ = (
+                entity.available,
+                entity.native_value,
+                entity.icon,
+                entity.assumed_state,
+                entity.extra_state_attributes,
+            )
+            entities.append(entity)
+
+    gc.collect()
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in end.compare_to(start, "filename"))
+
+
+async def async_main() -> dict:
+    """Measure every fleet size and return the results."""
+    results = {}
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        for size, (things, hours) in fixtures.SIZES.items():
+            allocated = await measure(hass, things, hours)
+            results[f"sensors[{size}]"] = {
+                "total_kib": allocated / 1024,
+                "per_device_kib": allocated / 1024 / things,
+            }
+            sys.stdout.write(
+                f"{'sensors[' + size + ']':<40}"
+                f"{allocated / 1024:>12.1f} KiB"
+                f"{allocated / 1024 / things:>12.1f} KiB\n"
+            )
+    return results
+
+
+def main() -> None:
+    """Parse the arguments and run the measurements."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", help="write the results to a JSON file")
+    args = parser.parse_args()
+
+    sys.stdout.write(f"{'benchmark':<40}{'total':>16}{'per device':>16}\n")
+    results = asyncio.run(async_main())
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
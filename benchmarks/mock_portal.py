@@ -0,0 +1,145 @@
+"""Local stand-in for ZCS Azzurro portal, for load and fault-injection tests.
+
+Run from the repository root, with Home Assistant installed:
+
+    python3 -m benchmarks.mock_portal --things 40 --latency 0.5 --error-rate 0.1
+
+then point the integration to it in configuration.yaml:
+
+    zcsazzurro:
+      auth_key: xxx
+      client_code: xxx
+      endpoint: http://localhost:19003
+
+The simulated thing keys are printed at startup. The server answers the same
+historicData/realtimeData POST protocol as the portal, and can inject
+latency, timeouts, 502/503 error pages and malformed JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime
+import json
+import logging
+import random
+
+from aiohttp import web
+
+from custom_components.zcsazzurro.api import ZCS_502_ERROR, ZCS_503_ERROR
+from custom_components.zcsazzurro.const import API_READ_TIMEOUT
+from homeassistant.util import dt as dt_util
+
+from . import fixtures
+
+_LOGGER = logging.getLogger(__name__)
+
+ERROR_PAGES = {
+    502: f"<html><head><title>{ZCS_502_ERROR}</title></head></html>",
+    503: f"<html><head><title>{ZCS_503_ERROR}</title></head></html>",
+}
+MALFORMED_BODY = '{"realtimeData": {"params": {"value": [{'
+
+
+class MockPortal:
+    """Simulate ZCS Azzurro portal for a fleet of inverters."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """Initialize the simulated fleet."""
+        self._args = args
+        self._random = random.Random(args.seed)
+        # every inverter gets its own peak power, reduced by clouds per request
+        self.peaks = {
+            thing_key: self._random.uniform(3000, 10000)
+            for thing_key in fixtures.thing_keys(args.things)
+        }
+        self.requests = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Answer a portal request, injecting the configured faults."""
+        self.requests += 1
+        args = self._args
+
+        if args.client_code and request.headers.get("Client") != args.client_code:
+            return web.Response(status=401, text="Unauthorized")
+
+        await asyncio.sleep(self._random.uniform(0, args.latency))
+
+        fault = self._random.random()
+        if fault < args.timeout_rate:
+            _LOGGER.info("Injecting timeout")
+            await asyncio.sleep(API_READ_TIMEOUT * 2)
+        elif fault < args.timeout_rate + args.error_rate:
+            status = self._random.choice(list(ERROR_PAGES))
+            _LOGGER.info("Injecting %s error", status)
+            return web.Response(
+                status=status, text=ERROR_PAGES[status], content_type="text/html"
+            )
+        elif fault < args.timeout_rate + args.error_rate + args.malformed_rate:
+            _LOGGER.info("Injecting malformed JSON")
+            return web.Response(text=MALFORMED_BODY, content_type="application/json")
+
+        try:
+            payload = json.loads(await request.read())
+        except ValueError:
+            return web.Response(status=400, text="Bad Request")
+
+        now = dt_util.utcnow()
+        response = {}
+        for command_id, command in payload.items():
+            params = command.get("params", {})
+            thing_key = params.get("thingKey")
+            if thing_key not in self.peaks:
+                continue
+            peak = self.peaks[thing_key] * self._random.uniform(0.6, 1)
+            if command.get("command") == "realtimeData":
+                value = fixtures.realtime_data(thing_key, now, peak)
+            elif command.get("command") == "historicData":
+                value = fixtures.historic_data_between(
+                    thing_key,
+                    _parse(params.get("start"), now),
+                    min(_parse(params.get("end"), now), now),
+                    peak,
+                )
+            else:
+                continue
+            response[command_id] = {
+                "command": command["command"],
+                "params": {"value": [{thing_key: value}]},
+            }
+
+        return web.json_response(response)
+
+
+def _parse(value: str | None, default: datetime) -> datetime:
+    parsed = None if value is None else dt_util.parse_datetime(value)
+    return default if parsed is None else parsed
+
+
+def main() -> None:
+    """Parse the arguments and run the mock portal."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=19003)
+    parser.add_argument("--things", type=int, default=1, help="simulated inverters")
+    parser.add_argument("--client-code", help="reject requests of other clients")
+    parser.add_argument(
+        "--latency", type=float, default=0, help="max seconds before answering"
+    )
+    parser.add_argument("--timeout-rate", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0, help="502/503 rate")
+    parser.add_argument("--malformed-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    portal = MockPortal(args)
+    _LOGGER.info("Simulating things: %s", ", ".join(portal.peaks))
+
+    app = web.Application()
+    app.router.add_post("/", portal.handle)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
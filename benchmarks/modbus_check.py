@@ -0,0 +1,173 @@
+"""Check of local mode against the Modbus/TCP simulator.
+
+Run from the repository root, with Home Assistant and pymodbus installed:
+
+    python3 -m benchmarks.modbus_check
+
+The simulator is served on a free local port, and its registers are read
+back with the reader of local mode, like the coordinator does on each poll.
+Every value must match the simulated one within the scale of its register,
+and a port with nothing listening must be reported as unavailable. A
+coordinator in local mode then reads the simulator, which is stopped: the
+device must show the portal values again, like on an inverter powered down
+at sunset. The script exits with a non-zero status on any mismatch.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import timedelta
+import socket
+import sys
+import tempfile
+from types import SimpleNamespace
+
+from pymodbus.server import ServerAsyncStop, StartAsyncTcpServer
+
+from custom_components.zcsazzurro.api import ZCSPortal
+from custom_components.zcsazzurro.const import CONF_THING_KEY
+from custom_components.zcsazzurro.coordinator import ZCSDataUpdateCoordinator
+from custom_components.zcsazzurro.local import REGISTERS, ZCSModbusReader
+from custom_components.zcsazzurro.models import ZCSSnapshot
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SLAVE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from . import fixtures
+from .modbus_simulator import ModbusSimulator
+
+HOST = "127.0.0.1"
+SLAVE = 1
+THING_KEY = fixtures.thing_keys(1)[0]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def _async_serve(simulator: ModbusSimulator, port: int) -> None:
+    server = asyncio.create_task(
+        StartAsyncTcpServer(context=simulator.context, address=(HOST, port))
+    )
+    for _ in range(50):
+        try:
+            _, writer = await asyncio.open_connection(HOST, port)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        await writer.wait_closed()
+        return
+    server.cancel()
+    raise RuntimeError(f"simulator not listening on port {port}")
+
+
+def _compare(simulator: ModbusSimulator, data: dict[str, float]) -> list[str]:
+    errors = []
+    for register in REGISTERS:
+        expected = simulator.values[register.data_tag]
+        value = data[register.data_tag]
+        if register.negative_data_tag is not None:
+            value -= data[register.negative_data_tag]
+        if abs(value - expected) > register.scale / 2 + 0.01:
+            errors.append(f"{register.data_tag}: read {value}, expected {expected}")
+    return errors
+
+
+def _coordinator(hass: HomeAssistant, port: int) -> ZCSDataUpdateCoordinator:
+    """Return a coordinator in local mode, with a portal lagging 10 minutes."""
+    portal = ZCSPortal(hass, "client", "auth")
+
+    async def async_fetch_thing(thing_key, *args):
+        return {
+            thing_key: fixtures.realtime_data(
+                thing_key, dt_util.utcnow() - timedelta(minutes=10)
+            )
+        }
+
+    portal.async_fetch_thing = async_fetch_thing
+    entry = SimpleNamespace(
+        entry_id=THING_KEY,
+        data={
+            CONF_THING_KEY: THING_KEY,
+            CONF_HOST: HOST,
+            CONF_PORT: port,
+            CONF_SLAVE: SLAVE,
+        },
+    )
+    return ZCSDataUpdateCoordinator(hass, portal, entry)
+
+
+async def _async_refresh(coordinator: ZCSDataUpdateCoordinator) -> ZCSSnapshot:
+    """Update the coordinator, returning the snapshot shown by the device."""
+    coordinator.data = await coordinator._async_update_data()
+    coordinator.async_update_listeners()
+    return coordinator.async_get_device(THING_KEY).snapshot
+
+
+async def async_check(hass: HomeAssistant, seconds: int) -> list[str]:
+    """Return the mismatches between the simulator and local mode."""
+    simulator = ModbusSimulator(
+        argparse.Namespace(slave=SLAVE, peak=fixtures.PEAK_POWER, seed=0)
+    )
+    port = _free_port()
+    simulator.update(0)
+    await _async_serve(simulator, port)
+
+    errors = []
+    reader = ZCSModbusReader(HOST, port, SLAVE)
+    coordinator = _coordinator(hass, port)
+    try:
+        for _ in range(seconds):
+            simulator.update(1)
+            data = await reader.async_read()
+            if data is None:
+                errors.append("simulator read as unavailable")
+                break
+            errors.extend(_compare(simulator, data))
+
+        snapshot = await _async_refresh(coordinator)
+        if snapshot is not coordinator.data[THING_KEY] or _compare(
+            simulator, snapshot.values
+        ):
+            errors.append("device not showing the local values")
+    finally:
+        reader.close()
+        await ServerAsyncStop()
+
+    snapshot = await _async_refresh(coordinator)
+    if snapshot is not coordinator.data[THING_KEY]:
+        errors.append("device not showing the portal values once the inverter stopped")
+    coordinator.local.close()
+
+    reader = ZCSModbusReader(HOST, _free_port(), SLAVE)
+    if await reader.async_read() is not None:
+        errors.append("closed port read as available")
+    reader.close()
+    return errors
+
+
+async def async_main(args: argparse.Namespace) -> list[str]:
+    """Run the check against a Home Assistant instance which is never started."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        return await async_check(HomeAssistant(config_dir), args.seconds)
+
+
+def main() -> None:
+    """Parse the arguments and run the check."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=5)
+    args = parser.parse_args()
+
+    errors = asyncio.run(async_main(args))
+    for error in errors:
+        sys.stdout.write(f"{error}\n")
+    if errors:
+        sys.exit(1)
+    sys.stdout.write(f"{args.seconds} local reads match the simulator\n")
+
+
+if __name__ == "__main__":
+    main()
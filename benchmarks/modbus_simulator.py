@@ -0,0 +1,125 @@
+"""Local Modbus/TCP simulator of a ZCS Azzurro inverter, for local mode tests.
+
+Run from the repository root, with Home Assistant and pymodbus installed:
+
+    python3 -m benchmarks.modbus_simulator --port 5020
+
+then add a ZCS Azzurro device with `localhost` as inverter address and 5020
+as Modbus/TCP port. The simulated inverter follows the same solar curve as
+the mock portal, and serves the registers read by local mode, refreshed
+every second.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext
+from pymodbus.server import StartAsyncTcpServer
+
+from custom_components.zcsazzurro.local import REGISTERS
+from homeassistant.util import dt as dt_util
+
+from . import fixtures
+
+try:
+    # pymodbus 3.10 renamed slaves to devices
+    from pymodbus.datastore import ModbusDeviceContext
+except ImportError:
+    from pymodbus.datastore import ModbusSlaveContext as ModbusDeviceContext
+
+_LOGGER = logging.getLogger(__name__)
+
+HOLDING_REGISTERS = 3
+
+
+class ModbusSimulator:
+    """Simulate the real-time registers of an inverter with a battery."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """Initialize the simulated inverter."""
+        self._args = args
+        self._random = random.Random(args.seed)
+        self._slave = ModbusDeviceContext(hr=ModbusSequentialDataBlock(0, [0] * 0x300))
+        self.context = ModbusServerContext({args.slave: self._slave}, single=False)
+        self._energy = dict.fromkeys(
+            (
+                "energyGenerating",
+                "energyExporting",
+                "energyImporting",
+                "energyConsuming",
+            ),
+            0.0,
+        )
+        self._soc = 50.0
+        self.values: dict[str, float] = {}
+
+    def update(self, elapsed: float) -> None:
+        """Update the registers with the values of the current second."""
+        generating = fixtures.solar_power(dt_util.utcnow(), self._args.peak)
+        consuming = self._random.uniform(300, 1500)
+        # the battery absorbs the surplus, and covers the deficit while charged
+        charging = generating - consuming
+        if charging > 0 and self._soc >= 100 or charging < 0 and self._soc <= 10:
+            charging = 0.0
+        self._soc = min(100.0, max(10.0, self._soc + charging * elapsed / 36000))
+        exporting = generating - consuming - charging
+
+        hours = elapsed / 3600
+        self._energy["energyGenerating"] += generating * hours / 1000
+        self._energy["energyExporting"] += max(exporting, 0) * hours / 1000
+        self._energy["energyImporting"] += max(-exporting, 0) * hours / 1000
+        self._energy["energyConsuming"] += consuming * hours / 1000
+
+        self.values = values = {
+            "powerCharging": charging,
+            "batterySoC": self._soc,
+            "powerExporting": exporting,
+            "powerConsuming": consuming,
+            "powerGenerating": generating,
+            "temperature": 25.0 + generating / 300,
+            **self._energy,
+        }
+        for register in REGISTERS:
+            raw = round(values[register.data_tag] / register.scale)
+            self._slave.setValues(HOLDING_REGISTERS, register.address, [raw & 0xFFFF])
+
+    async def run(self) -> None:
+        """Refresh the registers every second."""
+        while True:
+            self.update(1)
+            await asyncio.sleep(1)
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the simulator."""
+    simulator = ModbusSimulator(args)
+    simulator.update(0)
+    updater = asyncio.create_task(simulator.run())
+    try:
+        await StartAsyncTcpServer(
+            context=simulator.context, address=(args.host, args.port)
+        )
+    finally:
+        updater.cancel()
+
+
+def main() -> None:
+    """Parse the arguments and run the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--slave", type=int, default=1)
+    parser.add_argument("--peak", type=float, default=fixtures.PEAK_POWER)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    _LOGGER.info("Simulating inverter at %s:%s", args.host, args.port)
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
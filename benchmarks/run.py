@@ -0,0 +1,309 @@
+"""Benchmarks of the ZCS Azzurro hot paths.
+
+Run from the repository root, with Home Assistant installed:
+
+    python3 -m benchmarks.run [--json results.json] [--filter name]
+
+Every benchmark is measured on each fleet size of fixtures.SIZES, against a
+Home Assistant instance which is never started. Loop blocking benchmarks
+report the longest time the event loop was blocked during a run, instead of
+the duration of the run.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+import json
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from custom_components.zcsazzurro import (
+    api,
+    coordinator as zcs_coordinator,
+    flatdict_fix as flatdict,
+)
+from custom_components.zcsazzurro.api import ZCSPortal, _command_id, _error_status
+from custom_components.zcsazzurro.const import CONF_THING_KEY, CONF_THING_KEYS
+from custom_components.zcsazzurro.coordinator import ZCSDataUpdateCoordinator
+from custom_components.zcsazzurro.rate_limiter import ZCSRateLimiter
+from custom_components.zcsazzurro.sensor import SENSOR_TYPES, ZCSSensor
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
+
+from . import fixtures
+
+Benchmark = Callable[[HomeAssistant, int, int], Awaitable[Callable[[], Awaitable]]]
+
+BENCHMARKS: dict[str, Benchmark] = {}
+LOOP_BLOCKING: set[str] = set()
+REPEAT = 5
+
+
+def benchmark(
+    name: str, loop_blocking: bool = False
+) -> Callable[[Benchmark], Benchmark]:
+    """Register a benchmark, set up for a fleet size."""
+
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        if loop_blocking:
+            LOOP_BLOCKING.add(name)
+        return setup
+
+    return register
+
+
+@benchmark("decode")
+async def decode(hass: HomeAssistant, things: int, hours: int):
+    """Check and parse the raw body of a portal response."""
+    content = json.dumps(
+        fixtures.portal_response(things, hours, dt_util.utcnow())
+    ).encode()
+
+    async def run():
+        _error_status(200, content)
+        json_loads(content)
+
+    return run
+
+
+@benchmark("read_real_time_data")
+async def read_real_time_data(hass: HomeAssistant, things: int, hours: int):
+    """Read the real-time data of every thing from a portal response."""
+    portal = ZCSPortal(hass, "client", "auth")
+    response = fixtures.portal_response(things, hours, dt_util.utcnow())
+    thing_keys = fixtures.thing_keys(things)
+
+    async def run():
+        for thing_key in thing_keys:
+            await portal._read_real_time_data(response, thing_key, things > 1)
+
+    return run
+
+
+@benchmark("read_historic_data")
+async def read_historic_data(hass: HomeAssistant, things: int, hours: int):
+    """Read the historic data of every thing from a portal response."""
+    portal = ZCSPortal(hass, "client", "auth")
+    now = dt_util.utcnow()
+    response = fixtures.portal_response(things, hours, now)
+    thing_keys = fixtures.thing_keys(things)
+    real_time_ts = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    async def run():
+        for thing_key in thing_keys:
+            portal._store_historic_data(response, thing_key, things > 1)
+            portal._read_historic_data(thing_key, real_time_ts)
+
+    return run
+
+
+@benchmark("flatten")
+async def flatten(hass: HomeAssistant, things: int, hours: int):
+    """Flatten the real-time data of every thing."""
+    response = fixtures.portal_response(things, hours, dt_util.utcnow())
+    thing_data = [
+        response[_command_id("realtimeData", thing_key, things > 1)]["params"]["value"][
+            0
+        ][thing_key]
+        for thing_key in fixtures.thing_keys(things)
+    ]
+
+    async def run():
+        for data in thing_data:
+            dict(flatdict.FlatterDict(data, delimiter="|"))
+
+    return run
+
+
+@benchmark("sensor_render")
+async def sensor_render(hass: HomeAssistant, things: int, hours: int):
+    """Evaluate the properties written to the state machine by every sensor."""
+    entities = []
+    for thing_key, coordinator in (await _coordinators(hass, things, hours)).items():
+        entities.extend(
+            ZCSSensor(coordinator, 0, thing_key, definition.description)
+            for definition in SENSOR_TYPES
+        )
+
+    async def run():
+        for entity in entities:
+            _ = (
+                entity.available,
+                entity.native_value,
+                entity.icon,
+                entity.assumed_state,
+                entity.extra_state_attributes,
+            )
+
+    return run
+
+
+async def _fleet_refresh(hass: HomeAssistant, things: int, hours: int, offload: bool):
+    """Set up the first refresh of a fleet, fetched from a mocked portal."""
+    response = fixtures.portal_response(things, hours, dt_util.utcnow())
+    bodies: dict[tuple[str, ...], bytes] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        # yield to the event loop like a real network request
+        await asyncio.sleep(0)
+        command_ids = tuple(json.loads(request.content))
+        if command_ids not in bodies:
+            bodies[command_ids] = json.dumps(
+                {command_id: response[command_id] for command_id in command_ids}
+            ).encode()
+        return httpx.Response(200, content=bodies[command_ids])
+
+    portal = ZCSPortal(hass, "client", "auth")
+    portal._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    portal.rate_limiter = ZCSRateLimiter(1e9, 10**9)
+    entry = SimpleNamespace(
+        entry_id="fleet", data={CONF_THING_KEYS: fixtures.thing_keys(things)}
+    )
+    coordinator = ZCSDataUpdateCoordinator(hass, portal, entry)
+
+    async def run():
+        api.API_EXECUTOR_MIN_BYTES = api_executor_min_bytes if offload else float("inf")
+        zcs_coordinator.API_EXECUTOR_MIN_THINGS = (
+            coordinator_executor_min_things if offload else float("inf")
+        )
+        try:
+            coordinator.data = None
+            await coordinator._async_update_data()
+        finally:
+            api.API_EXECUTOR_MIN_BYTES = api_executor_min_bytes
+            zcs_coordinator.API_EXECUTOR_MIN_THINGS = coordinator_executor_min_things
+
+    return run
+
+
+api_executor_min_bytes = api.API_EXECUTOR_MIN_BYTES
+coordinator_executor_min_things = zcs_coordinator.API_EXECUTOR_MIN_THINGS
+
+
+@benchmark("loop_blocking_inline", loop_blocking=True)
+async def loop_blocking_inline(hass: HomeAssistant, things: int, hours: int):
+    """Refresh a fleet, parsing and flattening data in the event loop."""
+    return await _fleet_refresh(hass, things, hours, False)
+
+
+@benchmark("loop_blocking_executor", loop_blocking=True)
+async def loop_blocking_executor(hass: HomeAssistant, things: int, hours: int):
+    """Refresh a fleet, parsing and flattening large data in the executor."""
+    return await _fleet_refresh(hass, things, hours, True)
+
+
+async def _coordinators(
+    hass: HomeAssistant, things: int, hours: int
+) -> dict[str, ZCSDataUpdateCoordinator]:
+    """Return coordinators holding the data parsed from a portal response."""
+    portal = ZCSPortal(hass, "client", "auth")
+    response = fixtures.portal_response(things, hours, dt_util.utcnow())
+
+    async def fetch_data(payload, *args):
+        return (200, response)
+
+    portal._fetch_data = fetch_data
+    result = await portal.fetch_real_time_data(fixtures.thing_keys(things))
+
+    coordinators = {}
+    for thing_key in result:
+        entry = SimpleNamespace(entry_id=thing_key, data={CONF_THING_KEY: thing_key})
+        coordinator = ZCSDataUpdateCoordinator(hass, portal, entry)
+        coordinator.data = coordinator._flatten({thing_key: result[thing_key]})
+        coordinators[thing_key] = coordinator
+    return coordinators
+
+
+async def _measure(run: Callable[[], Awaitable]) -> list[float]:
+    """Return the seconds taken by a run, for each repetition."""
+    # calibrate the number of runs to last at least 0.2 seconds per repetition
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            await run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= 0.2:
+            break
+        number *= 2
+
+    timings = [elapsed / number]
+    for _ in range(REPEAT - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            await run()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+
+async def _measure_loop_blocking(run: Callable[[], Awaitable]) -> list[float]:
+    """Return the longest time the event loop was blocked, for each repetition."""
+    stalls = []
+    for _ in range(REPEAT):
+        heartbeat = {"running": True, "longest": 0.0}
+
+        async def beat(heartbeat: dict = heartbeat) -> None:
+            last = time.perf_counter()
+            while heartbeat["running"]:
+                await asyncio.sleep(0)
+                now = time.perf_counter()
+                heartbeat["longest"] = max(heartbeat["longest"], now - last)
+                last = now
+
+        task = asyncio.create_task(beat())
+        await asyncio.sleep(0)
+        await run()
+        heartbeat["running"] = False
+        await task
+        stalls.append(heartbeat["longest"])
+    return stalls
+
+
+async def async_main(args: argparse.Namespace) -> dict:
+    """Run the benchmarks and return their results."""
+    results = {}
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        for name, setup in BENCHMARKS.items():
+            if args.filter and args.filter not in name:
+                continue
+            for size, (things, hours) in fixtures.SIZES.items():
+                measure = _measure_loop_blocking if name in LOOP_BLOCKING else _measure
+                timings = await measure(await setup(hass, things, hours))
+                results[f"{name}[{size}]"] = {
+                    "min_ms": min(timings) * 1000,
+                    "median_ms": statistics.median(timings) * 1000,
+                }
+                sys.stdout.write(
+                    f"{name + '[' + size + ']':<40}"
+                    f"{min(timings) * 1000:>12.3f} ms"
+                    f"{statistics.median(timings) * 1000:>12.3f} ms\n"
+                )
+    return results
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", help="write the results to a JSON file")
+    parser.add_argument("--filter", help="only run benchmarks matching a name")
+    args = parser.parse_args()
+
+    sys.stdout.write(f"{'benchmark':<40}{'min':>15}{'median':>15}\n")
+    results = asyncio.run(async_main(args))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,28 +4,39 @@ from __future__ import annotations
 from datetime import timedelta
 import logging
 
-from . import flatdict_fix as flatdict
 import voluptuous as vol
 
 from homeassistant.components import persistent_notification
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.typing import ConfigType
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .api import ZCSPortal
+from .api import ZCS_ENDPOINT, ZCSPortal
 from .const import (
     API,
+    API_IDLE_POLL_INTERVAL,
     API_POLL_INTERVAL,
+    API_RATE_LIMIT,
     CONF_AUTH_KEY,
     CONF_CLIENT_CODE,
+    CONF_ENDPOINT,
+    CONF_IDLE_POLL_INTERVAL,
+    CONF_POLL_INTERVAL,
+    CONF_RATE_LIMIT,
+    CONF_SPLIT_REQUESTS,
     CONF_THING_KEY,
     COORDINATOR,
     DOMAIN,
     MANUFACTURER,
+    SERVICE_IMPORT_STATISTICS,
+    STATISTICS,
 )
+from .coordinator import ZCSDataUpdateCoordinator, async_remove_store
+from .statistics import ZCSStatisticsImporter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,6 +44,17 @@ CONFIG_SCHEMA_ROOT = vol.Schema(
     {
         vol.Required(CONF_AUTH_KEY): cv.string,
         vol.Required(CONF_CLIENT_CODE): cv.string,
+        vol.Optional(CONF_ENDPOINT, default=ZCS_ENDPOINT): cv.url,
+        vol.Optional(CONF_POLL_INTERVAL, default=API_POLL_INTERVAL): vol.All(
+            vol.Coerce(int), vol.Range(min=60)
+        ),
+        vol.Optional(CONF_IDLE_POLL_INTERVAL, default=API_IDLE_POLL_INTERVAL): vol.All(
+            vol.Coerce(int), vol.Range(min=60)
+        ),
+        vol.Optional(CONF_RATE_LIMIT, default=API_RATE_LIMIT): vol.All(
+            vol.Coerce(float), vol.Range(min=1)
+        ),
+        vol.Optional(CONF_SPLIT_REQUESTS, default=False): cv.boolean,
     }
 )
 
@@ -41,6 +63,14 @@ CONFIG_SCHEMA = vol.Schema(
     extra=vol.ALLOW_EXTRA,
 )
 
+IMPORT_STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_THING_KEY): cv.string,
+        vol.Required("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+    }
+)
+
 PLATFORMS = [
     Platform.SENSOR,
 ]
@@ -63,6 +93,39 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
     hass.data[DOMAIN][CONF_AUTH_KEY] = config[DOMAIN][CONF_AUTH_KEY]
     hass.data[DOMAIN][CONF_CLIENT_CODE] = config[DOMAIN][CONF_CLIENT_CODE]
+    hass.data[DOMAIN][CONF_POLL_INTERVAL] = config[DOMAIN][CONF_POLL_INTERVAL]
+    hass.data[DOMAIN][CONF_IDLE_POLL_INTERVAL] = max(
+        config[DOMAIN][CONF_IDLE_POLL_INTERVAL], config[DOMAIN][CONF_POLL_INTERVAL]
+    )
+    hass.data[DOMAIN][API] = ZCSPortal(
+        hass,
+        hass.data[DOMAIN][CONF_CLIENT_CODE],
+        hass.data[DOMAIN][CONF_AUTH_KEY],
+        config[DOMAIN][CONF_ENDPOINT],
+        config[DOMAIN][CONF_RATE_LIMIT],
+        config[DOMAIN][CONF_SPLIT_REQUESTS],
+    )
+
+    async def _async_import_statistics(call: ServiceCall) -> None:
+        thing_key = call.data[CONF_THING_KEY]
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            entry_data = hass.data[DOMAIN].get(entry.entry_id)
+            if entry_data and thing_key in entry_data[STATISTICS]:
+                break
+        else:
+            raise HomeAssistantError(f"No ZCS Azzurro device loaded for {thing_key}")
+
+        await entry_data[STATISTICS][thing_key].async_import(
+            dt_util.as_utc(call.data["start"]),
+            dt_util.as_utc(call.data.get("end", dt_util.utcnow())),
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_STATISTICS,
+        _async_import_statistics,
+        schema=IMPORT_STATISTICS_SCHEMA,
+    )
 
     return True
 
@@ -71,17 +134,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up ZCS Azzurro from a config entry."""
 
     hass.data[DOMAIN][entry.entry_id] = {}
-    hass.data[DOMAIN][entry.entry_id][CONF_THING_KEY] = entry.data[CONF_THING_KEY]
-    hass.data[DOMAIN][entry.entry_id][API] = ZCSPortal(
-        hass,
-        hass.data[DOMAIN][CONF_CLIENT_CODE],
-        hass.data[DOMAIN][CONF_AUTH_KEY],
-        entry.data[CONF_THING_KEY],
-    )
+    hass.data[DOMAIN][entry.entry_id][STATISTICS] = {}
 
     coordinator = await get_coordinator(hass, entry)
-    if not coordinator.last_update_success:
-        await coordinator.async_config_entry_first_refresh()
+
+    for thing_key in coordinator.thing_keys:
+        importer = ZCSStatisticsImporter(hass, hass.data[DOMAIN][API], thing_key)
+        hass.data[DOMAIN][entry.entry_id][STATISTICS][thing_key] = importer
+        entry.async_on_unload(
+            coordinator.async_add_listener(importer.async_handle_update)
+        )
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -93,43 +155,61 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not any(
+            other.entry_id in hass.data[DOMAIN]
+            for other in hass.config_entries.async_entries(DOMAIN)
+        ):
+            await hass.data[DOMAIN][API].async_close()
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data saved for a config entry."""
+    await async_remove_store(hass, entry)
+
+
 async def get_coordinator(
     hass: HomeAssistant,
     entry: ConfigEntry,
-) -> DataUpdateCoordinator:
+) -> ZCSDataUpdateCoordinator:
     """Get the data update coordinator."""
     if COORDINATOR in hass.data[DOMAIN][entry.entry_id]:
         return hass.data[DOMAIN][entry.entry_id][COORDINATOR]
 
-    async def async_fetch():
-        zcs_portal = hass.data[DOMAIN][entry.entry_id][API]
-
-        result = await zcs_portal.fetch_real_time_data()
-
-        flat_result: dict = {}
-        try:
-            for ent in result:
-                flat_result[ent] = dict(
-                    flatdict.FlatterDict(result[ent], delimiter="|")
-                )
-        except TypeError as ex:
-            raise UpdateFailed(ex) from ex
+    zcs_portal: ZCSPortal = hass.data[DOMAIN][API]
+    coordinator = ZCSDataUpdateCoordinator(
+        hass,
+        zcs_portal,
+        entry,
+        timedelta(seconds=hass.data[DOMAIN][CONF_POLL_INTERVAL]),
+        timedelta(seconds=hass.data[DOMAIN][CONF_IDLE_POLL_INTERVAL]),
+    )
+    # fleets and local devices poll on their own instead of joining batches,
+    # and local devices read their real-time values from the inverter
+    for thing_key in coordinator.thing_keys:
+        entry.async_on_unload(
+            zcs_portal.async_add_thing(
+                thing_key,
+                None
+                if coordinator.is_fleet or coordinator.local is not None
+                else coordinator.async_handle_batch_result,
+                None
+                if coordinator.local is not None
+                else coordinator.async_handle_historic_result,
+            )
+        )
+    if coordinator.local is not None:
+        entry.async_on_unload(coordinator.local.close)
+    entry.async_on_unload(coordinator.async_track_day_start())
 
-        for thing_key, data in flat_result.items():
-            redacted_thing_key = f"{thing_key[:3]}*****{thing_key[-3:]}"
-            _LOGGER.debug("Data for %s: %s", redacted_thing_key, data)
+    hass.data[DOMAIN][entry.entry_id][COORDINATOR] = coordinator
 
-        return flat_result
+    # entities come up with restored data while the first fetch runs
+    if await coordinator.async_restore():
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} first refresh"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
 
-    hass.data[DOMAIN][entry.entry_id][COORDINATOR] = DataUpdateCoordinator(
-        hass,
-        logging.getLogger(__name__),
-        name=DOMAIN,
-        update_method=async_fetch,
-        update_interval=timedelta(seconds=API_POLL_INTERVAL),
-    )
-    await hass.data[DOMAIN][entry.entry_id][COORDINATOR].async_refresh()
-    return hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+    return coordinator
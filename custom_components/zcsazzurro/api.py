@@ -1,206 +1,661 @@
 """API for ZCS Azzurro bound to Home Assistant OAuth."""
-from datetime import timedelta
-import json
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from importlib.util import find_spec
 import logging
+import time
 
 import httpx
 
 from homeassistant.components.rest.const import DEFAULT_SSL_CIPHER_LIST
-from homeassistant.components.rest.data import RestData
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.httpx_client import create_async_httpx_client
+from homeassistant.helpers.json import json_bytes
 from homeassistant.util import dt as dt_util
+from homeassistant.util.json import JSON_DECODE_EXCEPTIONS, json_loads
+from homeassistant.util.ssl import client_context
 
-from .const import API_READ_TIMEOUT
+from .circuit_breaker import ZCSCircuitBreaker
+from .const import (
+    API_EXECUTOR_MIN_BYTES,
+    API_HISTORIC_OVERLAP,
+    API_HISTORIC_WINDOW,
+    API_KEEPALIVE_EXPIRY,
+    API_MAX_CONNECTIONS,
+    API_MAX_THINGS_PER_REQUEST,
+    API_RATE_LIMIT,
+    API_READ_TIMEOUT,
+    API_REALTIME_TIMEOUT,
+    API_USE_CACHED_FLAG,
+)
+from .rate_limiter import ZCSRateLimiter
+from .series import ZCSTimeSeries
+from .telemetry import ZCSMetrics
 
 ZCS_ENDPOINT = "https://third.zcsazzurroportal.com:19003"
 ZCS_502_ERROR = "502 Proxy Error"
 ZCS_503_ERROR = "503 Service Unavailable"
+# error pages are told apart from JSON bodies by their first bytes only
+ZCS_ERROR_PREFIX_SIZE = 512
+
+HISTORIC_VALUES = (
+    "ts",
+    "currentDC",
+    "voltageDC",
+    "powerDC",
+    "temperature",
+    "energyGeneratingTotal",
+    "energyGenerating",
+    "powerGenerating",
+)
+
+# HTTP/2 is negotiated only when the optional h2 package is installed
+HTTP2_SUPPORTED = find_spec("h2") is not None
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class ZCSPortal:
-    """Provide class to wrap ZCS Azzurro portal API."""
+    """Provide class to wrap ZCS Azzurro portal API.
+
+    A single instance is shared by all config entries using the same client
+    code: polls requested by the coordinators are coalesced into one batch
+    covering every registered thing key, and results are fanned out to the
+    coordinators which did not ask for them.
+    """
 
     def __init__(
         self,
         hass: HomeAssistant,
         client_code: str,
         auth_key: str,
-        thing_key: str,
+        endpoint: str = ZCS_ENDPOINT,
+        rate_limit: float = API_RATE_LIMIT,
+        split_requests: bool = False,
     ) -> None:
-        """Create object representing ZCS API."""
+        """Create object representing ZCS API.
+
+        With split_requests, real-time and historic data are fetched by
+        concurrent requests: real-time values are returned as soon as they
+        are received, and historic data is handed to the historic callbacks
+        of the thing keys when ready.
+        """
         self._hass = hass
+        self._endpoint = endpoint
         self._client_code = client_code
         self._auth_key = auth_key
-        self._thing_key = thing_key
-        self._auth_key = auth_key
+        self._breaker = ZCSCircuitBreaker()
+        self._client: httpx.AsyncClient | None = None
+        self._historic_samples: dict[str, dict] = {}
+        self._series: dict[str, ZCSTimeSeries] = {}
+        self._realtime_values: dict[str, str] = {}
+        self._things: dict[str, Callable[[dict], None] | None] = {}
+        self._historic_callbacks: dict[str, Callable[[dict], None]] = {}
+        self._historic_tasks: dict[str, asyncio.Task] = {}
+        self._split_requests = split_requests
+        self._batch: asyncio.Task | None = None
+        self._batch_requesters: set[str] = set()
+        self.metrics = ZCSMetrics()
+        self.rate_limiter = ZCSRateLimiter(rate_limit)
+        self.batching = True
+
+    @property
+    def retry_after(self) -> float:
+        """Return the seconds before the portal is requested again."""
+        return self._breaker.retry_after
+
+    @callback
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the keep-alive client, creating it on first use."""
+        if self._client is None:
+            # Home Assistant sets its own pool limits on the client, so the
+            # longer keep-alive is set on the transport instead
+            transport = httpx.AsyncHTTPTransport(
+                verify=client_context(DEFAULT_SSL_CIPHER_LIST),
+                http2=HTTP2_SUPPORTED,
+                limits=httpx.Limits(
+                    max_connections=API_MAX_CONNECTIONS,
+                    max_keepalive_connections=API_MAX_CONNECTIONS,
+                    keepalive_expiry=API_KEEPALIVE_EXPIRY,
+                ),
+            )
+            # the client is closed on unload, not kept until shutdown
+            self._client = create_async_httpx_client(
+                self._hass,
+                auto_cleanup=False,
+                ssl_cipher_list=DEFAULT_SSL_CIPHER_LIST,
+                http2=HTTP2_SUPPORTED,
+                transport=transport,
+            )
+        return self._client
+
+    async def async_close(self) -> None:
+        """Close the connections to ZCS Azzurro portal."""
+        for task in set(self._historic_tasks.values()):
+            task.cancel()
+        self._historic_tasks.clear()
+        if self._client is not None:
+            client, self._client = self._client, None
+            # Home Assistant wraps aclose to warn integrations closing its
+            # clients, so the original one is called
+            await httpx.AsyncClient.aclose(client)
+
+    @callback
+    def async_add_thing(
+        self,
+        thing_key: str,
+        update_callback: Callable[[dict], None] | None = None,
+        historic_callback: Callable[[dict], None] | None = None,
+    ) -> CALLBACK_TYPE:
+        """Register a thing key to be fetched in every batch.
+
+        Thing keys registered without a callback are fetched on their own
+        schedule, and never added to batches requested for other things.
+        When requests are split, historic data fetched after the real-time
+        values is passed to the historic callback.
+        """
+        self._things[thing_key] = update_callback
+        if historic_callback is not None:
+            self._historic_callbacks[thing_key] = historic_callback
+
+        @callback
+        def remove_thing() -> None:
+            self._things.pop(thing_key, None)
+            self._historic_callbacks.pop(thing_key, None)
+            self._historic_tasks.pop(thing_key, None)
+            self._historic_samples.pop(thing_key, None)
+            self._series.pop(thing_key, None)
+            self._realtime_values.pop(thing_key, None)
+
+        return remove_thing
+
+    @callback
+    def async_set_realtime_values(
+        self, thing_key: str, required_values: list[str] | None
+    ) -> None:
+        """Set the real-time values to request for a thing key, None for all."""
+        if required_values is None:
+            self._realtime_values.pop(thing_key, None)
+        else:
+            self._realtime_values[thing_key] = ",".join(required_values)
+
+    async def async_fetch_thing(self, thing_key: str, priority: bool = False) -> dict:
+        """Fetch data for a thing key, joining the running batch if any."""
+        if self._batch is None:
+            self._batch_requesters = set()
+            self._batch = self._hass.async_create_task(
+                self._async_fetch_batch(priority)
+            )
+        self._batch_requesters.add(thing_key)
+
+        result = await asyncio.shield(self._batch)
+        if thing_key not in result:
+            # the batch was already running when the thing key joined it
+            result = await self.fetch_real_time_data([thing_key], priority)
+        return {thing_key: result[thing_key]}
+
+    async def _async_fetch_batch(self, priority: bool) -> dict:
+        """Fetch all registered thing keys and notify the ones not requesting."""
+        try:
+            batched = [
+                thing_key
+                for thing_key, update_callback in self._things.items()
+                if update_callback is not None
+            ]
+            result = await self.fetch_real_time_data(
+                list(dict.fromkeys([*batched, *self._batch_requesters])), priority
+            )
+        finally:
+            self._batch = None
+
+        for thing_key, update_callback in list(self._things.items()):
+            if (
+                update_callback is not None
+                and thing_key not in self._batch_requesters
+                and thing_key in result
+            ):
+                update_callback({thing_key: result[thing_key]})
+
+        return result
+
+    async def fetch_real_time_data(
+        self, thing_keys: list[str], priority: bool = False
+    ) -> dict:
+        """Fetch real time data from ZCS Azzurro portal.
 
-    async def fetch_real_time_data(self):
-        """Fetch real time data from ZCS Azzurro portal."""
+        Priority requests, like first refreshes, are let through the rate
+        limiter before the others. Thing keys are fetched one per request
+        once batching is turned off.
+        """
+        result = {}
+        for idx in range(0, len(thing_keys), API_MAX_THINGS_PER_REQUEST):
+            chunk = thing_keys[idx : idx + API_MAX_THINGS_PER_REQUEST]
+            if self.batching:
+                result |= await self._fetch_real_time_chunk(chunk, priority)
+                continue
+            for thing_key in chunk:
+                result |= await self._fetch_real_time_chunk([thing_key], priority)
+        return result
+
+    async def _fetch_real_time_chunk(
+        self, thing_keys: list[str], priority: bool
+    ) -> dict:
+        """Fetch real time data for a bounded number of thing keys at once."""
         now = dt_util.utcnow()
-        start = (now - timedelta(hours=8)).strftime("%Y-%m-%dT%H:%M:%SZ")
         end = now.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        _LOGGER.debug(
-            "Requesting real-time and historic (%s -> %s) data for %s",
-            start,
-            end,
-            self._thing_key,
-        )
+        # historic data still awaited by an older poll is left to this one,
+        # which requests the same samples again
+        for thing_key in thing_keys:
+            self._historic_tasks.pop(thing_key, None)
 
-        payload = {
-            "historicData": {
+        batched = len(thing_keys) > 1
+        historic_payload = {}
+        realtime_payload = {}
+        for thing_key in thing_keys:
+            start = self._historic_start(thing_key, now).strftime("%Y-%m-%dT%H:%M:%SZ")
+            _LOGGER.debug(
+                "Requesting real-time and historic (%s -> %s) data for %s",
+                start,
+                end,
+                thing_key,
+            )
+            historic_payload[_command_id("historicData", thing_key, batched)] = {
                 "command": "historicData",
                 "params": {
                     "start": start,
                     "end": end,
-                    "thingKey": self._thing_key,
-                    "requiredValues": "ts,currentDC,voltageDC,powerDC,temperature,energyGeneratingTotal,energyGenerating,powerGenerating",
+                    "thingKey": thing_key,
+                    "requiredValues": ",".join(HISTORIC_VALUES),
                 },
-            },
-            "realtimeData": {
+            }
+            realtime_payload[_command_id("realtimeData", thing_key, batched)] = {
                 "command": "realtimeData",
                 "params": {
-                    "thingKey": self._thing_key,
-                    "requiredValues": "*",
+                    "thingKey": thing_key,
+                    "requiredValues": self._realtime_values.get(thing_key, "*"),
                 },
-            },
-        }
+            }
 
-        api_result = await self._fetch_data(payload)
-        thing_result = {}
-        use_cached_result = False
+        if not self._split_requests:
+            api_result = await self._request(
+                historic_payload | realtime_payload, priority
+            )
+            if self._batching_unsupported(thing_keys, api_result):
+                return await self.fetch_real_time_data(thing_keys, priority)
+            return await self._read_results(thing_keys, api_result, api_result[1])
 
-        if api_result[1] is not None:
-            real_time_data = await self._read_real_time_data(api_result[1])
-            historic_data = await self._read_historic_data(
-                api_result[1], real_time_data.get("lastUpdate")
+        # slow historic queries must not hold back the real-time values, which
+        # are returned with the last seen historic sample meanwhile
+        historic_request = self._hass.async_create_background_task(
+            self._request(historic_payload, priority, API_READ_TIMEOUT),
+            f"{__name__} historic data",
+        )
+        api_result = await self._request(
+            realtime_payload, priority, API_REALTIME_TIMEOUT
+        )
+        if self._batching_unsupported(thing_keys, api_result):
+            return await self.fetch_real_time_data(thing_keys, priority)
+        if historic_request.done() and not historic_request.cancelled():
+            # the historic data arrived first: read it with the real-time values
+            return await self._read_results(
+                thing_keys, api_result, historic_request.result()[1]
             )
-            thing_result = real_time_data | historic_data
-            if thing_result.get("lastUpdate") is None:
-                thing_result = {}
-                use_cached_result = True
+        result = await self._read_results(thing_keys, api_result, None)
+
+        enrichment = self._hass.async_create_background_task(
+            self._async_enrich(thing_keys, historic_request, result),
+            f"{__name__} historic enrichment",
+        )
+        for thing_key in thing_keys:
+            self._historic_tasks[thing_key] = enrichment
+        return result
 
-        elif api_result[0] not in range(400, 500):
-            use_cached_result = True
+    def _batching_unsupported(self, thing_keys: list[str], api_result: tuple) -> bool:
+        """Turn batching off if a batched response has no data for any thing key.
 
-        thing_result["_use_cached_result"] = use_cached_result
+        The command ids of batched requests are not documented by the portal:
+        if it ignores them, thing keys are fetched one per request from then on.
+        """
+        if (
+            len(thing_keys) < 2
+            or api_result[1] is None
+            or any(
+                _command_id("realtimeData", thing_key, True) in api_result[1]
+                for thing_key in thing_keys
+            )
+        ):
+            return False
+
+        _LOGGER.warning(
+            "ZCS Azzurro portal ignored a batched request, "
+            "fetching devices one per request"
+        )
+        self.batching = False
+        return True
+
+    async def _read_results(
+        self, thing_keys: list[str], api_result: tuple, historic_result: dict | None
+    ) -> dict:
+        """Read the data of each thing key from the responses of the portal.
+
+        Without a historic response, the last seen historic sample is used.
+        """
+        batched = len(thing_keys) > 1
         result = {}
-        result[self._thing_key] = thing_result
+
+        for thing_key in thing_keys:
+            thing_result = {}
+            use_cached_result = False
+
+            if api_result[1] is not None:
+                real_time_data = await self._read_real_time_data(
+                    api_result[1], thing_key, batched
+                )
+                historic_data = {}
+                if historic_result is None or self._store_historic_data(
+                    historic_result, thing_key, batched
+                ):
+                    historic_data = self._read_historic_data(
+                        thing_key, real_time_data.get("lastUpdate")
+                    )
+                thing_result = (
+                    real_time_data | historic_data | self._read_aggregates(thing_key)
+                )
+                if thing_result.get("lastUpdate") is None:
+                    thing_result = {}
+                    use_cached_result = True
+
+            elif api_result[0] not in range(400, 500):
+                use_cached_result = True
+
+            thing_result[API_USE_CACHED_FLAG] = use_cached_result
+            result[thing_key] = thing_result
+
         return result
 
+    async def _async_enrich(
+        self, thing_keys: list[str], historic_request: asyncio.Task, result: dict
+    ) -> None:
+        """Hand the historic data to the callbacks of the thing keys when ready.
+
+        Thing keys fetched again in the meantime are left to the newer request.
+        """
+        batched = len(thing_keys) > 1
+        try:
+            historic_result = (await historic_request)[1]
+        finally:
+            current = asyncio.current_task()
+            thing_keys = [
+                thing_key
+                for thing_key in thing_keys
+                if self._historic_tasks.get(thing_key) is current
+            ]
+            for thing_key in thing_keys:
+                del self._historic_tasks[thing_key]
+        if historic_result is None:
+            return
+
+        enriched: dict[Callable[[dict], None], dict] = {}
+        for thing_key in thing_keys:
+            if not self._store_historic_data(historic_result, thing_key, batched):
+                continue
+            historic_callback = self._historic_callbacks.get(thing_key)
+            if historic_callback is None or result[thing_key][API_USE_CACHED_FLAG]:
+                continue
+            enriched.setdefault(historic_callback, {})[
+                thing_key
+            ] = self._read_historic_data(
+                thing_key, result[thing_key].get("lastUpdate")
+            ) | self._read_aggregates(
+                thing_key
+            )
+
+        for historic_callback, historic_data in enriched.items():
+            historic_callback(historic_data)
+
+    async def fetch_historic_data(
+        self, thing_key: str, start: datetime, end: datetime
+    ) -> dict | None:
+        """Fetch the historic data arrays of a thing key between two dates."""
+        command_id = _command_id("historicData", thing_key, False)
+        payload = {
+            command_id: {
+                "command": "historicData",
+                "params": {
+                    "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "thingKey": thing_key,
+                    "requiredValues": ",".join(HISTORIC_VALUES),
+                },
+            }
+        }
+
+        # historic data is only fetched in bulk, like for statistics imports
+        api_result = await self._request(payload, background=True)
+        if api_result[1] is None:
+            return None
+
+        try:
+            return api_result[1][command_id]["params"]["value"][0][thing_key]
+        except KeyError:
+            _LOGGER.warning(
+                "No historic data in response from ZCS Azzurro portal for %s",
+                thing_key,
+            )
+        return None
+
+    async def _request(
+        self,
+        payload: dict,
+        priority: bool = False,
+        timeout: int = API_READ_TIMEOUT,
+        background: bool = False,
+    ):
+        """Fetch data from ZCS Azzurro portal unless the circuit breaker is open.
+
+        Requests wait for the rate limiter shared by the client code,
+        background requests behind all the others.
+        """
+        if not self._breaker.allow_request():
+            _LOGGER.debug("Skipping request to ZCS Azzurro portal while failing")
+            self.metrics.count("outcome", "skipped")
+            return (503, None)
+
+        try:
+            self.metrics.record(
+                "rate_limit_wait",
+                await self.rate_limiter.acquire(priority, background),
+            )
+            api_result = await self._fetch_data(payload, timeout)
+        except BaseException:
+            # a cancelled probe must not leave the breaker half open forever
+            self._breaker.record_cancelled()
+            raise
+
+        if api_result[1] is None:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+        return api_result
+
     async def _fetch_data(self, payload: dict, timeout: int = API_READ_TIMEOUT):
         """Fetch data from ZCS Azzurro portal."""
 
-        string_payload = json.dumps(payload)
-
         headers = {
             "Client": self._client_code,
             "Authorization": self._auth_key,
         }
 
-        rest = RestData(
-            self._hass,
-            "POST",
-            ZCS_ENDPOINT,
-            "utf8",
-            None,
-            headers,
-            None,
-            string_payload,
-            False,
-            DEFAULT_SSL_CIPHER_LIST,
-            timeout,
-        )
-        await rest.async_update()
-
-        if rest.data is None and isinstance(
-            rest.last_exception, httpx.TimeoutException
-        ):
+        start = time.perf_counter()
+        try:
+            response = await self._get_client().post(
+                self._endpoint,
+                content=json_bytes(payload),
+                headers=headers,
+                timeout=timeout,
+            )
+        except httpx.TimeoutException:
             _LOGGER.warning(
-                "Timeout fetching data from ZCS Azzurro portal at %s", ZCS_ENDPOINT
+                "Timeout fetching data from ZCS Azzurro portal at %s", self._endpoint
             )
+            self.metrics.count("outcome", "timeout")
             return (0, None)
-
-        if rest.data is None:
-            message = (
-                "unknown reason"
-                if rest.last_exception is None
-                else str(rest.last_exception)
-            )
+        except httpx.RequestError as ex:
             _LOGGER.error(
-                "Error fetching data from ZCS Azzurro portal, reason is: %s", message
+                "Error fetching data from ZCS Azzurro portal, reason is: %s", ex
             )
+            self.metrics.count("outcome", "request_error")
             return (400, None)
 
-        if ZCS_502_ERROR in rest.data:
-            _LOGGER.warning("ZCS Azzurro portal is unavailable: %s", ZCS_502_ERROR)
-            return (502, None)
+        # the body is decoded from bytes, without copying it into a string
+        content = response.content
+        self.metrics.record("latency", time.perf_counter() - start)
+        self.metrics.record("response_bytes", len(content))
 
-        if ZCS_503_ERROR in rest.data:
-            _LOGGER.warning("ZCS Azzurro portal is unavailable: %s", ZCS_503_ERROR)
-            return (503, None)
+        error_status = _error_status(response.status_code, content)
+        if error_status is not None:
+            _LOGGER.warning(
+                "ZCS Azzurro portal is unavailable: %s",
+                ZCS_502_ERROR if error_status == 502 else ZCS_503_ERROR,
+            )
+            self.metrics.count("outcome", f"http_{error_status}")
+            return (error_status, None)
 
         try:
-            return (200, json.loads(rest.data))
-        except json.decoder.JSONDecodeError:
+            with self.metrics.measure("parse_time"):
+                # large responses would stall the event loop while parsed
+                if len(content) >= API_EXECUTOR_MIN_BYTES:
+                    result = await self._hass.async_add_executor_job(
+                        json_loads, content
+                    )
+                else:
+                    result = json_loads(content)
+        except JSON_DECODE_EXCEPTIONS:
             _LOGGER.warning(
-                "Unable to parse result from ZCS Azzurro portal: %s", rest.data
+                "Unable to parse result from ZCS Azzurro portal: %s",
+                content[:ZCS_ERROR_PREFIX_SIZE],
             )
+            self.metrics.count("outcome", "invalid_json")
             return (500, None)
 
-    async def _read_real_time_data(self, api_result):
+        self.metrics.count("outcome", "ok")
+        return (200, result)
+
+    async def _read_real_time_data(self, api_result, thing_key, batched):
         real_time_data = {}
         try:
-            real_time_data = api_result["realtimeData"]["params"]["value"][0][
-                self._thing_key
-            ]
+            real_time_data = api_result[
+                _command_id("realtimeData", thing_key, batched)
+            ]["params"]["value"][0][thing_key]
         except KeyError:
             _LOGGER.warning(
                 "No real-time data in response from ZCS Azzurro portal for %s",
-                self._thing_key,
+                thing_key,
             )
         return real_time_data
 
-    async def _read_historic_data(self, api_result, real_time_ts):
-        historic_data = {}
+    def _historic_start(self, thing_key: str, now: datetime) -> datetime:
+        """Return the start of the historic window to request for a thing key.
+
+        Only the samples after the last seen one are requested, with a small
+        overlap; the window is bounded when the last sample is unknown or old.
+        """
+        window_start = now - timedelta(seconds=API_HISTORIC_WINDOW)
+        sample = self._historic_samples.get(thing_key)
+        if sample is None or sample["ts"] is None:
+            return window_start
+
+        last_ts = dt_util.parse_datetime(sample["ts"])
+        if last_ts is None:
+            return window_start
+
+        return max(window_start, last_ts - timedelta(seconds=API_HISTORIC_OVERLAP))
+
+    def _store_historic_data(self, api_result, thing_key, batched) -> bool:
+        """Store the historic samples of a thing key, False if missing."""
         try:
-            historic_data_raw = api_result["historicData"]["params"]["value"][0][
-                self._thing_key
-            ]
+            historic_data_raw = api_result[
+                _command_id("historicData", thing_key, batched)
+            ]["params"]["value"][0][thing_key]
             historic_data_idx = len(historic_data_raw["ts"]) - 1
-            if historic_data_idx < 0:
-                return historic_data
-            historic_ts = historic_data_raw["ts"][historic_data_idx]
-            if real_time_ts is None or (
-                historic_ts is not None
-                and dt_util.parse_datetime(historic_ts)
-                > dt_util.parse_datetime(real_time_ts)
-            ):
-                historic_data["lastUpdate"] = historic_ts
-                historic_data["powerGenerating"] = historic_data_raw["powerGenerating"][
-                    historic_data_idx
-                ]
-                historic_data["energyGenerating"] = historic_data_raw[
-                    "energyGenerating"
-                ][historic_data_idx]
-                historic_data["energyGeneratingTotal"] = historic_data_raw[
-                    "energyGeneratingTotal"
-                ][historic_data_idx]
-            historic_data["currentDC"] = historic_data_raw["currentDC"][
-                historic_data_idx
-            ]
-            historic_data["voltageDC"] = historic_data_raw["voltageDC"][
-                historic_data_idx
-            ]
-            historic_data["powerDC"] = historic_data_raw["powerDC"][historic_data_idx]
-            historic_data["temperature"] = historic_data_raw["temperature"][
-                historic_data_idx
-            ]
+            self._series.setdefault(thing_key, ZCSTimeSeries()).extend(
+                historic_data_raw
+            )
+            if historic_data_idx >= 0:
+                self._historic_samples[thing_key] = {
+                    value: historic_data_raw[value][historic_data_idx]
+                    for value in HISTORIC_VALUES
+                }
         except KeyError:
             _LOGGER.warning(
                 "No historic data in response from ZCS Azzurro portal for %s",
-                self._thing_key,
+                thing_key,
             )
+            return False
+        return True
+
+    def _read_historic_data(self, thing_key, real_time_ts):
+        historic_data = {}
+        # the requested window may hold no new sample: reuse the last seen one
+        # until it falls out of the bounded window
+        sample = self._historic_samples.get(thing_key)
+        if sample is None:
+            return historic_data
+        historic_ts = sample["ts"]
+        parsed_historic_ts = (
+            None if historic_ts is None else dt_util.parse_datetime(historic_ts)
+        )
+        if parsed_historic_ts is not None and parsed_historic_ts < (
+            dt_util.utcnow() - timedelta(seconds=API_HISTORIC_WINDOW)
+        ):
+            self._historic_samples.pop(thing_key)
+            return historic_data
+
+        if real_time_ts is None or (
+            parsed_historic_ts is not None
+            and parsed_historic_ts > dt_util.parse_datetime(real_time_ts)
+        ):
+            historic_data["lastUpdate"] = historic_ts
+            historic_data["powerGenerating"] = sample["powerGenerating"]
+            historic_data["energyGenerating"] = sample["energyGenerating"]
+            historic_data["energyGeneratingTotal"] = sample["energyGeneratingTotal"]
+        historic_data["currentDC"] = sample["currentDC"]
+        historic_data["voltageDC"] = sample["voltageDC"]
+        historic_data["powerDC"] = sample["powerDC"]
+        historic_data["temperature"] = sample["temperature"]
         return historic_data
+
+    def _read_aggregates(self, thing_key: str) -> dict:
+        """Return the values derived from the historic samples of a thing key."""
+        series = self._series.get(thing_key)
+        if series is None:
+            return {}
+        return series.aggregates(dt_util.utcnow())
+
+
+def _error_status(status_code: int, content: bytes) -> int | None:
+    """Return 502 or 503 if the portal answered with an error page."""
+    if status_code in (502, 503):
+        return status_code
+
+    head = content[:ZCS_ERROR_PREFIX_SIZE]
+    if head.lstrip().startswith(b"{"):
+        return None
+    if ZCS_502_ERROR.encode() in head:
+        return 502
+    if ZCS_503_ERROR.encode() in head:
+        return 503
+    return None
+
+
+def _command_id(command: str, thing_key: str, batched: bool) -> str:
+    """Return the payload key identifying a command for a thing key.
+
+    Requests for a single thing key use the plain command name as key, like
+    the portal documentation; batched requests need a key per thing key.
+    """
+    if not batched:
+        return command
+    return f"{command}|{thing_key}"
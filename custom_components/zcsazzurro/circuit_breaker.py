@@ -0,0 +1,91 @@
+"""Circuit breaker protecting ZCS Azzurro portal during outages."""
+from __future__ import annotations
+
+import logging
+import random
+import time
+
+from .const import API_BREAKER_BASE_DELAY, API_BREAKER_MAX_DELAY, API_BREAKER_THRESHOLD
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ZCSCircuitBreaker:
+    """Stop requesting data to ZCS Azzurro portal while it is failing.
+
+    After a number of consecutive failures the breaker opens and requests are
+    skipped for an exponentially growing, jittered delay. Once the delay is
+    over a single probe request is let through: the breaker closes again if it
+    succeeds, otherwise it reopens with a longer delay.
+    """
+
+    def __init__(
+        self,
+        threshold: int = API_BREAKER_THRESHOLD,
+        base_delay: float = API_BREAKER_BASE_DELAY,
+        max_delay: float = API_BREAKER_MAX_DELAY,
+    ) -> None:
+        """Initialize the circuit breaker."""
+        self._threshold = threshold
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._failures = 0
+        self._opened = 0
+        self._retry_at = 0.0
+        self.state = STATE_CLOSED
+
+    @property
+    def retry_after(self) -> float:
+        """Return the seconds before the next request is let through."""
+        if self.state == STATE_CLOSED:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Return True if a request can be sent to the portal."""
+        if self.state == STATE_CLOSED:
+            return True
+
+        if self.state == STATE_OPEN and time.monotonic() >= self._retry_at:
+            _LOGGER.debug(
+                "Probing ZCS Azzurro portal after %s failures", self._failures
+            )
+            self.state = STATE_HALF_OPEN
+            return True
+
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful request and close the breaker."""
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("ZCS Azzurro portal is available again")
+        self._failures = 0
+        self._opened = 0
+        self.state = STATE_CLOSED
+
+    def record_cancelled(self) -> None:
+        """Record a request which did not complete, letting another probe in."""
+        if self.state == STATE_HALF_OPEN:
+            self.state = STATE_OPEN
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the breaker if needed."""
+        self._failures += 1
+        if self.state == STATE_CLOSED and self._failures < self._threshold:
+            return
+
+        # jitter avoids probing the portal in lockstep with other clients
+        delay = min(self._max_delay, self._base_delay * 2**self._opened)
+        delay = random.uniform(delay / 2, delay)
+        self._opened += 1
+        self._retry_at = time.monotonic() + delay
+        self.state = STATE_OPEN
+        _LOGGER.warning(
+            "ZCS Azzurro portal failed %s times, next request in %.0f seconds",
+            self._failures,
+            delay,
+        )
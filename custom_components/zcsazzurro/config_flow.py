@@ -1,11 +1,26 @@
 """Config flow for ZCS Azzurro."""
 from __future__ import annotations
 
+import re
+
 import voluptuous as vol
 
 from homeassistant.config_entries import CONN_CLASS_CLOUD_POLL, ConfigFlow
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SLAVE
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
 
-from .const import CONF_THING_KEY, DOMAIN
+from .const import (
+    API_LOCAL_POLL_INTERVAL,
+    CONF_LOCAL_POLL_INTERVAL,
+    CONF_THING_KEY,
+    CONF_THING_KEYS,
+    DOMAIN,
+    MODBUS_DEFAULT_PORT,
+    MODBUS_DEFAULT_SLAVE,
+)
+from .coordinator import entry_thing_keys
+from .local import MODBUS_SUPPORTED, ZCSModbusReader
 
 
 class ZCSAzzurroConfigFlow(ConfigFlow, domain=DOMAIN):
@@ -17,22 +32,36 @@ class ZCSAzzurroConfigFlow(ConfigFlow, domain=DOMAIN):
     def __init__(self):
         """Initialize config flow."""
         self._thing_key = None
+        self._thing_keys = None
+        self._local = {}
+
+    async def async_step_user(self, user_input=None):
+        """Handle a flow initiated by the user."""
+        return self.async_show_menu(step_id="user", menu_options=["device", "fleet"])
 
     async def _show_setup_form(self, errors=None):
         """Show the setup form to the user."""
         return self.async_show_form(
-            step_id="user",
+            step_id="device",
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_THING_KEY): str,
+                    vol.Optional(CONF_HOST): str,
+                    vol.Optional(CONF_PORT, default=MODBUS_DEFAULT_PORT): cv.port,
+                    vol.Optional(CONF_SLAVE, default=MODBUS_DEFAULT_SLAVE): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=247)
+                    ),
+                    vol.Optional(
+                        CONF_LOCAL_POLL_INTERVAL, default=API_LOCAL_POLL_INTERVAL
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5)),
                 },
             ),
             errors=errors or {},
             last_step=True,
         )
 
-    async def async_step_user(self, user_input=None):
-        """Handle a flow initiated by the user."""
+    async def async_step_device(self, user_input=None):
+        """Handle the setup of a single device."""
         if user_input is None:
             return await self._show_setup_form(user_input)
 
@@ -41,13 +70,84 @@ class ZCSAzzurroConfigFlow(ConfigFlow, domain=DOMAIN):
         await self.async_set_unique_id(f"{self._thing_key}")
         self._abort_if_unique_id_configured()
 
+        if self._thing_key in self._configured_thing_keys():
+            return self.async_abort(reason="already_configured")
+
+        # devices with an address are read locally over Modbus/TCP
+        if user_input.get(CONF_HOST):
+            if not MODBUS_SUPPORTED:
+                return await self._show_setup_form({"base": "modbus_unavailable"})
+
+            reader = ZCSModbusReader(
+                user_input[CONF_HOST], user_input[CONF_PORT], user_input[CONF_SLAVE]
+            )
+            values = await reader.async_read()
+            reader.close()
+            if values is None:
+                return await self._show_setup_form({"base": "cannot_connect"})
+
+            self._local = {
+                key: user_input[key]
+                for key in (CONF_HOST, CONF_PORT, CONF_SLAVE, CONF_LOCAL_POLL_INTERVAL)
+            }
+
         return self._async_create_entry()
 
+    async def _show_fleet_form(self, errors=None):
+        """Show the fleet setup form to the user."""
+        return self.async_show_form(
+            step_id="fleet",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_THING_KEYS): TextSelector(
+                        TextSelectorConfig(multiline=True)
+                    ),
+                },
+            ),
+            errors=errors or {},
+            last_step=True,
+        )
+
+    async def async_step_fleet(self, user_input=None):
+        """Handle the setup of a fleet of devices, polled by a single scheduler."""
+        if user_input is None:
+            return await self._show_fleet_form(user_input)
+
+        # serial numbers are separated by new lines, commas or spaces
+        self._thing_keys = list(
+            dict.fromkeys(
+                thing_key
+                for thing_key in re.split(r"[\s,;]+", user_input[CONF_THING_KEYS])
+                if thing_key
+            )
+        )
+        if not self._thing_keys:
+            return await self._show_fleet_form({CONF_THING_KEYS: "no_thing_keys"})
+
+        if not self._configured_thing_keys().isdisjoint(self._thing_keys):
+            return self.async_abort(reason="already_configured")
+
+        return self.async_create_entry(
+            title=f"Fleet of {len(self._thing_keys)} devices",
+            data={
+                CONF_THING_KEYS: self._thing_keys,
+            },
+        )
+
+    def _configured_thing_keys(self) -> set[str]:
+        """Return the thing keys of the devices already configured."""
+        return {
+            thing_key
+            for entry in self._async_current_entries(include_ignore=False)
+            for thing_key in entry_thing_keys(entry)
+        }
+
     def _async_create_entry(self):
         """Handle create entry."""
         return self.async_create_entry(
             title=f"{self._thing_key}",
             data={
                 CONF_THING_KEY: self._thing_key,
+                **self._local,
             },
         )
@@ -3,16 +3,77 @@
 DOMAIN = "zcsazzurro"
 VERSION = "0.1.0"
 API_READ_TIMEOUT = 30
+API_REALTIME_TIMEOUT = 10  # Real-time values fetched on their own answer quickly
+API_KEEPALIVE_EXPIRY = 600  # Keep portal connections open across polls
+API_MAX_CONNECTIONS = 4
 API_POLL_INTERVAL = 300  # Fetch data every 5 min
+API_IDLE_POLL_INTERVAL = 1800  # Fetch data every 30 min at night or when idle
+API_CACHE_MAX_AGE = 3600  # Serve last fetched data for 1 hour during failures
+API_STORE_DELAY = 60  # Save last fetched data at most once a minute
+API_HISTORIC_WINDOW = 28800  # Never request more than 8 hours of samples
+API_HISTORIC_OVERLAP = 600  # Re-request 10 min before the last seen sample
+API_BREAKER_THRESHOLD = 2  # Stop requesting data after consecutive failures
+API_BREAKER_BASE_DELAY = 60  # First delay before probing the portal again
+API_BREAKER_MAX_DELAY = 3600
+API_STATISTICS_CHUNK = 86400  # Import statistics one day at a time
+API_STATISTICS_MAX_GAP = 604800  # Fill gaps in statistics up to one week
+API_STATISTICS_LAG = 900  # Import an hour once the portal received its samples
+API_MAX_THINGS_PER_REQUEST = 10  # Bound the size of batched payloads
+API_LOCAL_POLL_INTERVAL = 10  # Read the inverter every 10 s in local mode
+API_LOCAL_TIMEOUT = 5
+API_RATE_LIMIT = 30  # Requests per minute allowed for a client code
+API_RATE_LIMIT_BURST = 10
+API_EXECUTOR_MIN_BYTES = 65536  # Parse larger responses out of the event loop
+API_EXECUTOR_MIN_THINGS = 50  # Flatten data of larger fleets out of the event loop
+API_METRICS_SIZE = 288  # Keep poll telemetry of the last day at 5 min
 MANUFACTURER = "ZCS Azzurro"
+MODBUS_DEFAULT_PORT = 502
+MODBUS_DEFAULT_SLAVE = 1
 
 # Conf keys
 CONF_THING_KEY = "thing_key"
+CONF_THING_KEYS = "thing_keys"
 CONF_AUTH_KEY = "auth_key"
 CONF_CLIENT_CODE = "client_code"
+CONF_ENDPOINT = "endpoint"
+CONF_POLL_INTERVAL = "poll_interval"
+CONF_IDLE_POLL_INTERVAL = "idle_poll_interval"
+CONF_RATE_LIMIT = "rate_limit"
+CONF_LOCAL_POLL_INTERVAL = "local_poll_interval"
+CONF_SPLIT_REQUESTS = "split_requests"
 
 API = "api"
+API_USE_CACHED_FLAG = "_use_cached_result"
 COORDINATOR = "coordinator"
+STATISTICS = "statistics"
+
+SERVICE_IMPORT_STATISTICS = "import_statistics"
+
+# Real-time values always requested, and the ones the status is derived from
+REALTIME_REQUIRED_VALUES = ("lastUpdate", "thingFind")
+STATUS_DATA_TAGS = ("powerGenerating", "powerConsuming", "powerAutoconsuming")
+
+# Pseudo data tag changing on every successful fetch, for entities showing it
+DATA_TAG_FETCHED_AT = "_fetched_at"
+# Pseudo data tag changing when energy counters are reset at local midnight
+DATA_TAG_AWAITING_FIRST_SAMPLE = "_awaiting_first_sample"
+
+# Values derived from the historic samples, never requested to the portal
+DATA_TAG_POWER_AVERAGE_15M = "powerGeneratingAverage15m"
+DATA_TAG_POWER_AVERAGE_1H = "powerGeneratingAverage1h"
+DATA_TAG_POWER_PEAK_TODAY = "powerGeneratingPeakToday"
+DATA_TAG_EFFICIENCY_DC = "efficiencyDC"
+DATA_TAG_TEMPERATURE_MAX_TODAY = "temperatureMaxToday"
+DERIVED_DATA_TAGS = (
+    DATA_TAG_POWER_AVERAGE_15M,
+    DATA_TAG_POWER_AVERAGE_1H,
+    DATA_TAG_POWER_PEAK_TODAY,
+    DATA_TAG_EFFICIENCY_DC,
+    DATA_TAG_TEMPERATURE_MAX_TODAY,
+)
+
+# Statuses for which the device is polled at the idle interval
+IDLE_STATUSES = ("not_connected", "off")
 
 STATUS_ICON = {
     "generating_consuming_from_network": "mdi:solar-power-variant-outline",
@@ -0,0 +1,512 @@
+"""Data update coordinator for the ZCS Azzurro integration."""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+import dataclasses
+from datetime import datetime, timedelta
+import logging
+import math
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SLAVE, SUN_EVENT_SUNRISE
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import sun
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from . import flatdict_fix as flatdict
+from .api import ZCSPortal
+from .const import (
+    API_CACHE_MAX_AGE,
+    API_EXECUTOR_MIN_THINGS,
+    API_IDLE_POLL_INTERVAL,
+    API_LOCAL_POLL_INTERVAL,
+    API_MAX_THINGS_PER_REQUEST,
+    API_POLL_INTERVAL,
+    API_STORE_DELAY,
+    API_USE_CACHED_FLAG,
+    CONF_LOCAL_POLL_INTERVAL,
+    CONF_THING_KEY,
+    CONF_THING_KEYS,
+    DATA_TAG_AWAITING_FIRST_SAMPLE,
+    DATA_TAG_FETCHED_AT,
+    DERIVED_DATA_TAGS,
+    DOMAIN,
+    IDLE_STATUSES,
+    MODBUS_DEFAULT_PORT,
+    MODBUS_DEFAULT_SLAVE,
+    REALTIME_REQUIRED_VALUES,
+)
+from .local import ZCSModbusReader
+from .models import ZCSDataContext, ZCSDevice, ZCSSnapshot
+from .telemetry import ZCSMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+class ZCSDataUpdateCoordinator(DataUpdateCoordinator[dict[str, ZCSSnapshot]]):
+    """Coordinate the updates of a ZCS Azzurro device, or of a fleet of devices.
+
+    The devices of a fleet are split in the fewest shards of at most
+    API_MAX_THINGS_PER_REQUEST thing keys, of even sizes, polled in turn
+    so that every device is polled once per interval while requests are
+    spread evenly across it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        portal: ZCSPortal,
+        entry: ConfigEntry,
+        poll_interval: timedelta = timedelta(seconds=API_POLL_INTERVAL),
+        idle_poll_interval: timedelta = timedelta(seconds=API_IDLE_POLL_INTERVAL),
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=poll_interval,
+        )
+        self._poll_interval = poll_interval
+        self._idle_poll_interval = idle_poll_interval
+        self._portal = portal
+        self._data_tags: dict[str, Counter[str]] = {}
+        self._last_good: dict[str, ZCSSnapshot] = {}
+        self._store: Store[dict[str, dict]] = Store(
+            hass, STORAGE_VERSION, _storage_key(entry)
+        )
+        self.is_fleet = CONF_THING_KEYS in entry.data
+        self.thing_keys: list[str] = entry_thing_keys(entry)
+        # thing keys are dealt round-robin, so that shards differ by one at most
+        shards = math.ceil(len(self.thing_keys) / API_MAX_THINGS_PER_REQUEST)
+        self._shards = [self.thing_keys[idx::shards] for idx in range(shards)]
+        self._next_shard = 0
+        self._first_update = True
+        self.local: ZCSModbusReader | None = None
+        if CONF_HOST in entry.data:
+            self.local = ZCSModbusReader(
+                entry.data[CONF_HOST],
+                entry.data.get(CONF_PORT, MODBUS_DEFAULT_PORT),
+                entry.data.get(CONF_SLAVE, MODBUS_DEFAULT_SLAVE),
+            )
+        self._local_poll_interval = timedelta(
+            seconds=entry.data.get(CONF_LOCAL_POLL_INTERVAL, API_LOCAL_POLL_INTERVAL)
+        )
+        self._portal_data: dict[str, ZCSSnapshot] | None = None
+        self._updating = False
+        self._pending_historic: dict[str, dict] = {}
+        self._notified_data: dict[str, ZCSSnapshot] = {}
+        self.devices: dict[str, ZCSDevice] = {}
+        self._start_of_day = dt_util.start_of_local_day()
+        self._notified_success = True
+        self._portal_due = dt_util.utcnow()
+        self.metrics = ZCSMetrics()
+
+    async def async_restore(self) -> bool:
+        """Restore the last snapshots saved before a restart.
+
+        Restored snapshots are served as cached data, until a fresh update
+        succeeds or they are older than API_CACHE_MAX_AGE.
+        """
+        stored = await self._store.async_load()
+        if not stored:
+            return False
+
+        # entities are set up for the restored devices only, so every device
+        # of the entry must be restored
+        data = {}
+        for thing_key in self.thing_keys:
+            stored_snapshot = stored.get(thing_key)
+            if stored_snapshot is None:
+                return False
+            fetched_at = dt_util.parse_datetime(stored_snapshot["fetched_at"])
+            if fetched_at is None:
+                return False
+            self._last_good[thing_key] = dataclasses.replace(
+                ZCSSnapshot.from_data(stored_snapshot["values"]),
+                fetched_at=fetched_at,
+            )
+            data[thing_key] = dataclasses.replace(
+                self._last_good[thing_key], is_cached=True
+            )
+
+        self.data = data
+        return True
+
+    @callback
+    def _data_to_store(self) -> dict[str, dict]:
+        return {
+            thing_key: {
+                "values": dict(snapshot.values),
+                "fetched_at": snapshot.fetched_at.isoformat(),
+            }
+            for thing_key, snapshot in self._last_good.items()
+        }
+
+    async def _async_update_data(self) -> dict[str, ZCSSnapshot]:
+        """Fetch data of the device, sharing the request with other devices.
+
+        Fleets fetch every device on the first update, then a shard each time.
+        """
+        # the first refresh of a device is not delayed by other requests
+        priority = self._first_update
+        self._first_update = False
+
+        if self.local is not None:
+            return await self._async_update_local_data(priority)
+
+        # historic data received meanwhile belongs to the data of this update,
+        # which is stored as soon as it is returned
+        self._updating = True
+        try:
+            data = await self._async_update_portal_data(priority)
+        finally:
+            self._updating = False
+            pending, self._pending_historic = self._pending_historic, {}
+        return self._merge_historic(data, pending)
+
+    async def _async_update_portal_data(self, priority: bool) -> dict[str, ZCSSnapshot]:
+        """Fetch the device, or the next shard of the fleet, from the portal."""
+        if not self.is_fleet:
+            data = await self._async_process(
+                await self._portal.async_fetch_thing(self.thing_keys[0], priority)
+            )
+        elif self.data is None:
+            data = await self._async_process(
+                await self._portal.fetch_real_time_data(self.thing_keys, priority)
+            )
+        else:
+            shard = self._shards[self._next_shard]
+            self._next_shard = (self._next_shard + 1) % len(self._shards)
+            data = self.data | await self._async_process(
+                await self._portal.fetch_real_time_data(shard)
+            )
+
+        self._async_adapt_update_interval(data)
+        return data
+
+    async def _async_update_local_data(self, priority: bool) -> dict[str, ZCSSnapshot]:
+        """Read the device over Modbus/TCP, fetching the portal at its own pace.
+
+        The values which cannot be read locally come from the last portal
+        update, which is also served while the device is not reachable.
+        """
+        thing_key = self.thing_keys[0]
+        if self._portal_data is None or dt_util.utcnow() >= self._portal_due:
+            self._portal_data = await self._async_process(
+                await self._portal.async_fetch_thing(thing_key, priority)
+            )
+            self._async_adapt_update_interval(self._portal_data)
+            self._portal_due = dt_util.utcnow() + self.update_interval
+
+        local_values = await self.local.async_read()
+        if local_values is None:
+            self.metrics.count("local", "fallback")
+            self.update_interval = max(
+                self._local_poll_interval, self._portal_due - dt_util.utcnow()
+            )
+            return self._portal_data
+
+        self.metrics.count("local", "ok")
+        self.update_interval = self._local_poll_interval
+        portal_values = {
+            data_tag: value
+            for data_tag, value in self._portal_data[thing_key].values.items()
+            if data_tag != API_USE_CACHED_FLAG
+        }
+        # lastUpdate stays the one of the portal, so that the device accepts
+        # the portal data again when the inverter stops answering: the time
+        # of the local read is the fetch time of the snapshot
+        return {thing_key: ZCSSnapshot.from_data(portal_values | local_values)}
+
+    @callback
+    def async_get_device(self, thing_key: str) -> ZCSDevice:
+        """Return the state shared by the entities of a device."""
+        if (device := self.devices.get(thing_key)) is None:
+            device = self.devices[thing_key] = ZCSDevice(
+                thing_key, self.data[thing_key], self._start_of_day
+            )
+        return device
+
+    @callback
+    def async_track_day_start(self) -> CALLBACK_TYPE:
+        """Reset the energy counters of the devices at every local midnight."""
+        return async_track_time_change(
+            self.hass, self._async_start_day, hour=0, minute=0, second=0
+        )
+
+    @callback
+    def _async_start_day(self, now: datetime) -> None:
+        self._start_of_day = dt_util.start_of_local_day(now)
+        _LOGGER.debug("Starting day at %s", self._start_of_day)
+        self._async_notify_listeners(
+            {
+                thing_key: {DATA_TAG_AWAITING_FIRST_SAMPLE}
+                for thing_key, device in self.devices.items()
+                if device.start_day(self._start_of_day)
+            }
+        )
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the listeners whose data tags changed since the last update.
+
+        Listeners without a ZCSDataContext are always notified, and every
+        listener is notified when the availability or the cached state of its
+        device changed.
+        """
+        data = self.data or {}
+        changed: dict[str, set[str] | None] = {}
+        for thing_key, snapshot in data.items():
+            previous = self._notified_data.get(thing_key)
+            if previous is snapshot:
+                continue
+            changed_data_tags = _changed_data_tags(previous, snapshot)
+            device = self.devices.get(thing_key)
+            if device is not None and device.update(snapshot):
+                if changed_data_tags is not None:
+                    changed_data_tags.add(DATA_TAG_AWAITING_FIRST_SAMPLE)
+            changed[thing_key] = changed_data_tags
+        notify_all = self._notified_success != self.last_update_success
+        self._notified_data = dict(data)
+        self._notified_success = self.last_update_success
+        self._async_notify_listeners(changed, notify_all)
+
+    @callback
+    def _async_notify_listeners(
+        self, changed: dict[str, set[str] | None], notify_all: bool = False
+    ) -> None:
+        """Notify the listeners of the changed data tags, None for all tags."""
+        notified = 0
+        for update_callback, context in list(self._listeners.values()):
+            if (
+                notify_all
+                or not isinstance(context, ZCSDataContext)
+                or context.thing_key in changed
+                and (
+                    changed[context.thing_key] is None
+                    or not context.data_tags.isdisjoint(changed[context.thing_key])
+                )
+            ):
+                notified += 1
+                update_callback()
+        self.metrics.record("notified_listeners", notified)
+
+    @callback
+    def async_add_data_tags(
+        self, thing_key: str, data_tags: Iterable[str]
+    ) -> CALLBACK_TYPE:
+        """Request the data tags read by an enabled entity on next updates."""
+        data_tags = tuple(data_tags)
+        self._data_tags.setdefault(thing_key, Counter()).update(data_tags)
+        self._async_update_realtime_values(thing_key)
+
+        @callback
+        def remove_data_tags() -> None:
+            self._data_tags[thing_key].subtract(data_tags)
+            self._async_update_realtime_values(thing_key)
+
+        return remove_data_tags
+
+    @callback
+    def _async_update_realtime_values(self, thing_key: str) -> None:
+        data_tags = {
+            tag for tag, count in self._data_tags[thing_key].items() if count > 0
+        }
+        self._portal.async_set_realtime_values(
+            thing_key,
+            [
+                *REALTIME_REQUIRED_VALUES,
+                *sorted(data_tags.difference(DERIVED_DATA_TAGS)),
+            ]
+            if data_tags
+            else None,
+        )
+
+    @callback
+    def async_handle_batch_result(self, result: dict) -> None:
+        """Handle data fetched by a batch requested by another coordinator."""
+        try:
+            data = self._process(result)
+        except UpdateFailed as ex:
+            self.async_set_update_error(ex)
+            return
+
+        self._async_adapt_update_interval(data)
+        self.async_set_updated_data(data)
+
+    @callback
+    def async_handle_historic_result(self, result: dict) -> None:
+        """Merge the historic data fetched after the real-time values.
+
+        Historic data received while an update is running is merged into the
+        data of that update, once fetched.
+        """
+        if self._updating:
+            self._pending_historic |= result
+            return
+
+        if not self.data:
+            return
+
+        # only the entities reading historic values are notified
+        self.data = self._merge_historic(self.data, result)
+        self.async_update_listeners()
+
+    def _merge_historic(
+        self, data: dict[str, ZCSSnapshot], result: dict
+    ) -> dict[str, ZCSSnapshot]:
+        """Return the data with the historic values of the fresh snapshots."""
+        if not result:
+            return data
+
+        data = dict(data)
+        for thing_key, historic_data in result.items():
+            snapshot = data.get(thing_key)
+            if snapshot is None or snapshot.is_cached or snapshot.use_cached_result:
+                continue
+            data[thing_key] = self._last_good[thing_key] = dataclasses.replace(
+                ZCSSnapshot.from_data(dict(snapshot.values) | historic_data),
+                fetched_at=snapshot.fetched_at,
+            )
+        self._store.async_delay_save(self._data_to_store, API_STORE_DELAY)
+        return data
+
+    @callback
+    def _async_adapt_update_interval(self, data: dict[str, ZCSSnapshot]) -> None:
+        """Poll slowly while the sun is down, the device is idle or the portal fails.
+
+        At night the next poll is never scheduled later than sunrise, so that
+        the normal interval is restored as soon as generation may resume.
+        """
+        if sun.is_up(self.hass):
+            is_idle = all(
+                snapshot.status in IDLE_STATUSES for snapshot in data.values()
+            )
+            update_interval = (
+                self._idle_poll_interval if is_idle else self._poll_interval
+            )
+        else:
+            next_sunrise = sun.get_astral_event_next(self.hass, SUN_EVENT_SUNRISE)
+            update_interval = max(
+                self._poll_interval,
+                min(self._idle_poll_interval, next_sunrise - dt_util.utcnow()),
+            )
+
+        # back off while the portal is failing
+        self.update_interval = max(
+            update_interval / len(self._shards),
+            timedelta(seconds=self._portal.retry_after),
+        )
+
+    async def _async_process(self, result: dict) -> dict[str, ZCSSnapshot]:
+        """Parse the fetched data, out of the event loop for large fleets."""
+        if len(result) < API_EXECUTOR_MIN_THINGS:
+            return self._process(result)
+
+        with self.metrics.measure("flatten_time"):
+            data = await self.hass.async_add_executor_job(self._flatten, result)
+        return self._apply_cache(data)
+
+    def _process(self, result: dict) -> dict[str, ZCSSnapshot]:
+        """Parse the fetched data, falling back to the cache when needed."""
+        with self.metrics.measure("flatten_time"):
+            data = self._flatten(result)
+        return self._apply_cache(data)
+
+    def _apply_cache(self, data: dict[str, ZCSSnapshot]) -> dict[str, ZCSSnapshot]:
+        """Serve the last good snapshot while fresh data cannot be fetched.
+
+        The last good snapshot is served until it is older than
+        API_CACHE_MAX_AGE, whatever the number of updates in the meantime.
+        """
+        for thing_key, snapshot in data.items():
+            if not snapshot.use_cached_result:
+                self._last_good[thing_key] = snapshot
+                self._store.async_delay_save(self._data_to_store, API_STORE_DELAY)
+                self.metrics.count("cache", "fresh")
+                continue
+
+            last_good = self._last_good.get(thing_key)
+            if last_good is None:
+                self.metrics.count("cache", "missing")
+                continue
+
+            if last_good.age > timedelta(seconds=API_CACHE_MAX_AGE):
+                self._last_good.pop(thing_key)
+                self.metrics.count("cache", "expired")
+                continue
+
+            self.metrics.count("cache", "fallback")
+
+            _LOGGER.debug(
+                "Using data fetched %s ago for %s",
+                last_good.age,
+                f"{thing_key[:3]}*****{thing_key[-3:]}",
+            )
+            data[thing_key] = dataclasses.replace(last_good, is_cached=True)
+
+        return data
+
+    @staticmethod
+    def _flatten(result: dict) -> dict[str, ZCSSnapshot]:
+        flat_result: dict = {}
+        try:
+            for ent in result:
+                flat_result[ent] = ZCSSnapshot.from_data(
+                    dict(flatdict.FlatterDict(result[ent], delimiter="|"))
+                )
+        except TypeError as ex:
+            raise UpdateFailed(ex) from ex
+
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            return flat_result
+
+        for thing_key, snapshot in flat_result.items():
+            redacted_thing_key = f"{thing_key[:3]}*****{thing_key[-3:]}"
+            _LOGGER.debug("Data for %s: %s", redacted_thing_key, snapshot.values)
+
+        return flat_result
+
+
+def _changed_data_tags(
+    previous: ZCSSnapshot | None, snapshot: ZCSSnapshot
+) -> set[str] | None:
+    """Return the data tags changed between two snapshots, None for all."""
+    if (
+        previous is None
+        or previous.is_cached != snapshot.is_cached
+        or previous.use_cached_result != snapshot.use_cached_result
+    ):
+        return None
+
+    changed = {
+        data_tag
+        for data_tag in previous.values.keys() | snapshot.values.keys()
+        if previous.values.get(data_tag) != snapshot.values.get(data_tag)
+    }
+    if previous.fetched_at != snapshot.fetched_at:
+        changed.add(DATA_TAG_FETCHED_AT)
+    return changed
+
+
+def entry_thing_keys(entry: ConfigEntry) -> list[str]:
+    """Return the thing keys of the devices of a config entry."""
+    if CONF_THING_KEYS in entry.data:
+        return list(entry.data[CONF_THING_KEYS])
+    return [entry.data[CONF_THING_KEY]]
+
+
+async def async_remove_store(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the snapshots saved for a config entry."""
+    await Store(hass, STORAGE_VERSION, _storage_key(entry)).async_remove()
+
+
+def _storage_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}"
@@ -7,27 +7,39 @@ from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceEntry
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import CONF_THING_KEY, COORDINATOR, DOMAIN
+from .api import ZCSPortal
+from .const import API, CONF_THING_KEY, CONF_THING_KEYS, COORDINATOR, DOMAIN
+from .coordinator import ZCSDataUpdateCoordinator
 
-TO_REDACT = {CONF_THING_KEY, "serial"}
+TO_REDACT = {CONF_THING_KEY, CONF_THING_KEYS, "serial"}
 
 
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, config_entry: ConfigEntry
 ) -> dict:
     """Return diagnostics for a config entry."""
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id][
+    coordinator: ZCSDataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id][
         COORDINATOR
     ]
 
-    thing_key = config_entry.data[CONF_THING_KEY]
-    device_data = coordinator.data[thing_key]
+    portal: ZCSPortal = hass.data[DOMAIN][API]
+
+    devices_data = [
+        async_redact_data(dict(coordinator.data[thing_key].values), TO_REDACT)
+        for thing_key in coordinator.thing_keys
+        if thing_key in coordinator.data
+    ]
 
     diagnostics_data = {
         "info": async_redact_data(config_entry.data, TO_REDACT),
-        "data": async_redact_data(device_data, TO_REDACT),
+        "data": devices_data if coordinator.is_fleet else devices_data[0],
+        "telemetry": {
+            "portal": portal.metrics.as_dict(),
+            "rate_limiter_queued": portal.rate_limiter.queued,
+            "batching": portal.batching,
+            "coordinator": coordinator.metrics.as_dict(),
+        },
     }
 
     return diagnostics_data
@@ -37,18 +49,19 @@ async def async_get_device_diagnostics(
     hass: HomeAssistant, config_entry: ConfigEntry, device: DeviceEntry
 ) -> dict[str, Any]:
     """Return diagnostics for a device."""
+    thing_key = next(
+        identifier for domain, identifier in device.identifiers if domain == DOMAIN
+    )
+
     info = {}
     info["manufacturer"] = device.manufacturer
-    info["serial"] = config_entry.data[CONF_THING_KEY]
+    info["serial"] = thing_key
 
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id][
+    coordinator: ZCSDataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id][
         COORDINATOR
     ]
 
-    device_data = {}
-
-    for key in coordinator.data:
-        device_data = coordinator.data[key]
+    device_data = dict(coordinator.data[thing_key].values)
 
     diagnostics_data = {
         "info": async_redact_data(info, TO_REDACT),
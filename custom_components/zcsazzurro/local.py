@@ -0,0 +1,137 @@
+"""Local Modbus/TCP access to ZCS Azzurro inverters."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from importlib.util import find_spec
+import inspect
+import logging
+from typing import Any
+
+from .const import API_LOCAL_TIMEOUT
+
+# Modbus/TCP is available only when the optional pymodbus package is installed
+MODBUS_SUPPORTED = find_spec("pymodbus") is not None
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ZCSRegister:
+    """Holding register of the inverter mapped to a data tag.
+
+    Signed registers may carry two data tags, one for each direction of the
+    flow: the positive part is read as data_tag, the negative one as
+    negative_data_tag.
+    """
+
+    data_tag: str
+    address: int
+    scale: float
+    signed: bool = False
+    negative_data_tag: str | None = None
+
+
+# Real-time registers of the Sofar HYD protocol, spoken by ZCS Azzurro HYD
+# inverters and by their datalogger
+REGISTERS = (
+    ZCSRegister("powerCharging", 0x020D, 10, True, "powerDischarging"),
+    ZCSRegister("batterySoC", 0x0210, 1),
+    ZCSRegister("powerExporting", 0x0212, 10, True, "powerImporting"),
+    ZCSRegister("powerConsuming", 0x0213, 10),
+    ZCSRegister("powerGenerating", 0x0215, 10),
+    ZCSRegister("energyGenerating", 0x0218, 0.01),
+    ZCSRegister("energyExporting", 0x0219, 0.01),
+    ZCSRegister("energyImporting", 0x021A, 0.01),
+    ZCSRegister("energyConsuming", 0x021B, 0.01),
+    ZCSRegister("temperature", 0x0238, 1, True),
+)
+REGISTERS_START = min(register.address for register in REGISTERS)
+REGISTERS_COUNT = max(register.address for register in REGISTERS) - REGISTERS_START + 1
+
+
+class ZCSModbusReader:
+    """Read the real-time values of an inverter over Modbus/TCP.
+
+    Values are returned with the same data tags as the portal, so that they
+    can replace the real-time values fetched from it.
+    """
+
+    def __init__(self, host: str, port: int, slave: int) -> None:
+        """Initialize the reader."""
+        self._host = host
+        self._port = port
+        self._slave = slave
+        self._client: Any = None
+        self._unit_keyword = "slave"
+
+    async def async_read(self) -> dict[str, Any] | None:
+        """Read the real-time values, None if the inverter is not reachable."""
+        # imported on first use, as most installations never need it
+        from pymodbus.exceptions import ModbusException
+
+        try:
+            client = await self._async_connect()
+            response = await asyncio.wait_for(
+                client.read_holding_registers(
+                    REGISTERS_START,
+                    count=REGISTERS_COUNT,
+                    **{self._unit_keyword: self._slave},
+                ),
+                API_LOCAL_TIMEOUT,
+            )
+        # TypeError is raised by pymodbus releases with an unknown API
+        except (ModbusException, OSError, TimeoutError, TypeError) as ex:
+            _LOGGER.debug(
+                "Unable to read from %s:%s, reason is: %s", self._host, self._port, ex
+            )
+            self.close()
+            return None
+
+        if response.isError():
+            _LOGGER.debug(
+                "Error reading from %s:%s: %s", self._host, self._port, response
+            )
+            return None
+
+        return _decode(response.registers)
+
+    async def _async_connect(self) -> Any:
+        if self._client is None or not self._client.connected:
+            from pymodbus.client import AsyncModbusTcpClient
+
+            self.close()
+            self._client = AsyncModbusTcpClient(
+                self._host, port=self._port, timeout=API_LOCAL_TIMEOUT, retries=0
+            )
+            if not await self._client.connect():
+                raise OSError(f"Connection to {self._host}:{self._port} failed")
+            # pymodbus 3.10 renamed the slave argument to device_id
+            if (
+                "device_id"
+                in inspect.signature(self._client.read_holding_registers).parameters
+            ):
+                self._unit_keyword = "device_id"
+        return self._client
+
+    def close(self) -> None:
+        """Close the connection to the inverter."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            client.close()
+
+
+def _decode(registers: list[int]) -> dict[str, Any]:
+    values: dict[str, Any] = {}
+    for register in REGISTERS:
+        raw = registers[register.address - REGISTERS_START]
+        if register.signed and raw >= 0x8000:
+            raw -= 0x10000
+        value = round(raw * register.scale, 2)
+
+        if register.negative_data_tag is None:
+            values[register.data_tag] = value
+        else:
+            values[register.data_tag] = max(value, 0)
+            values[register.negative_data_tag] = max(-value, 0)
+    return values
@@ -0,0 +1,194 @@
+"""Data models for the ZCS Azzurro integration."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Any
+
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.util import dt as dt_util
+
+from .const import API_USE_CACHED_FLAG, DOMAIN, MANUFACTURER, STATUS_ICON
+
+
+@dataclass(frozen=True, slots=True)
+class ZCSSnapshot:
+    """Immutable data of a ZCS Azzurro device, parsed once per update."""
+
+    values: Mapping[str, Any]
+    last_update: datetime | None
+    first_update: datetime | None
+    status: str | None
+    status_icon: str | None
+    use_cached_result: bool
+    fetched_at: datetime
+    is_cached: bool = False
+
+    @classmethod
+    def from_data(cls, data: dict[str, Any]) -> ZCSSnapshot:
+        """Create a snapshot from the flattened data of a device."""
+        status = _derive_status(data)
+        return cls(
+            values=MappingProxyType(data),
+            last_update=_parse_datetime(data.get("lastUpdate")),
+            first_update=_parse_datetime(data.get("thingFind")),
+            status=status,
+            status_icon=STATUS_ICON.get(status),
+            use_cached_result=bool(data.get(API_USE_CACHED_FLAG)),
+            fetched_at=dt_util.utcnow(),
+        )
+
+    @property
+    def age(self) -> timedelta:
+        """Return the time elapsed since the data was fetched."""
+        return dt_util.utcnow() - self.fetched_at
+
+    def get(self, data_tag: str | None) -> Any:
+        """Return the value read from the device for a data tag."""
+        return self.values.get(data_tag)
+
+
+class ZCSDevice:
+    """State of a ZCS Azzurro device, shared by all of its entities.
+
+    Snapshots older than the newest one observed, like the ones returned by a
+    portal lagging behind, are ignored so that entities keep showing the
+    newest values. Attributes are rendered once per update for all entities.
+
+    Energy counters of the device restart at local midnight, but the portal
+    keeps reporting the values of the previous day until the device sends
+    its first sample of the new day: awaiting_first_sample tells entities to
+    show the counters as reset meanwhile.
+    """
+
+    __slots__ = (
+        "thing_key",
+        "redacted_thing_key",
+        "device_info",
+        "snapshot",
+        "last_seen",
+        "attributes",
+        "serial_attributes",
+        "start_of_day",
+        "awaiting_first_sample",
+    )
+
+    def __init__(
+        self, thing_key: str, snapshot: ZCSSnapshot, start_of_day: datetime
+    ) -> None:
+        """Initialize the state from the first snapshot of the device."""
+        self.thing_key = thing_key
+        self.redacted_thing_key = f"{thing_key[:3]}*****{thing_key[-3:]}"
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, thing_key)},
+            name=thing_key,
+            manufacturer=MANUFACTURER,
+        )
+        self.serial_attributes: Mapping[str, Any] = MappingProxyType(
+            {"serial": thing_key}
+        )
+        self.last_seen: datetime | None = None
+        self.start_of_day = start_of_day
+        self.awaiting_first_sample = False
+        self.update(snapshot)
+
+    def start_day(self, start_of_day: datetime) -> bool:
+        """Start a new local day, returning True if the counters were reset."""
+        self.start_of_day = start_of_day
+        return self._update_awaiting_first_sample()
+
+    def update(self, snapshot: ZCSSnapshot) -> bool:
+        """Observe a new snapshot of the device, unless out of date.
+
+        Return True if the counters were reset or the first sample of the
+        day was received.
+        """
+        last_update = snapshot.last_update
+        if (
+            last_update is not None
+            and self.last_seen is not None
+            and last_update < self.last_seen
+        ):
+            return False
+
+        self.snapshot = snapshot
+        if last_update is not None:
+            self.last_seen = last_update
+        self.attributes = MappingProxyType(
+            {
+                "last_update": snapshot.get("lastUpdate"),
+                "first_update": snapshot.get("thingFind"),
+                # failed updates without a cached snapshot carry no data at all
+                "last_fetch": (
+                    None
+                    if snapshot.use_cached_result
+                    else snapshot.fetched_at.isoformat()
+                ),
+                "serial": self.thing_key,
+            }
+        )
+        return self._update_awaiting_first_sample()
+
+    def _update_awaiting_first_sample(self) -> bool:
+        awaiting_first_sample = (
+            self.last_seen is not None and self.last_seen < self.start_of_day
+        )
+        changed = awaiting_first_sample != self.awaiting_first_sample
+        self.awaiting_first_sample = awaiting_first_sample
+        return changed
+
+
+@dataclass(frozen=True, slots=True)
+class ZCSDataContext:
+    """Data tags of a device an entity is rendered from.
+
+    Passed as context of coordinator listeners, so that entities are only
+    notified when one of their data tags changed.
+    """
+
+    thing_key: str
+    data_tags: frozenset[str]
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    return None if value is None else dt_util.parse_datetime(value)
+
+
+def _derive_status(data: dict[str, Any]) -> str | None:
+    if data.get("thingFind") is None:
+        return None
+
+    power_generating = data.get("powerGenerating")
+    power_consuming = data.get("powerConsuming")
+    power_autoconsuming = data.get("powerAutoconsuming")
+
+    is_connected = (
+        power_generating is not None
+        or power_consuming is not None
+        or power_autoconsuming is not None
+    )
+    is_generating = power_generating is not None and power_generating > 0
+    is_consuming = power_consuming is not None and power_consuming > 0
+    is_autoconsuming = power_autoconsuming is not None and power_autoconsuming > 0
+
+    if is_generating and is_consuming:
+        return "generating_consuming_from_network"
+
+    if is_generating and is_autoconsuming:
+        return "generating_consuming_from_produced"
+
+    if is_generating:
+        return "generating"
+
+    if is_consuming:
+        return "consuming_from_network"
+
+    if is_autoconsuming:
+        return "consuming_from_produced"
+
+    if not is_connected:
+        return "not_connected"
+
+    return "off"
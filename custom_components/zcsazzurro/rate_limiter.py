@@ -0,0 +1,84 @@
+"""Rate limiter sharing the request budget of a ZCS Azzurro client code."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+from itertools import count
+import logging
+import time
+
+from .const import API_RATE_LIMIT, API_RATE_LIMIT_BURST
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ZCSRateLimiter:
+    """Limit the requests sent to ZCS Azzurro portal with a token bucket.
+
+    The bucket holds up to burst tokens and is refilled at the configured
+    number of requests per minute. Requests exceeding the budget are queued
+    and let through in order as tokens become available, priority requests
+    (like the first refresh of a device) before the others, and background
+    requests (like statistics imports) after all of them.
+    """
+
+    def __init__(
+        self, rate: float = API_RATE_LIMIT, burst: int = API_RATE_LIMIT_BURST
+    ) -> None:
+        """Initialize the rate limiter, rate being in requests per minute."""
+        self._rate = rate / 60
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = count()
+        self._dispatcher: asyncio.Task | None = None
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a token."""
+        return sum(not waiter.done() for _, _, waiter in self._waiters)
+
+    async def acquire(self, priority: bool = False, background: bool = False) -> float:
+        """Wait for a token, returning the seconds waited."""
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+
+        start = time.monotonic()
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        order = 0 if priority else 2 if background else 1
+        heapq.heappush(self._waiters, (order, next(self._sequence), waiter))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        await waiter
+        waited = time.monotonic() - start
+        _LOGGER.debug("Request to ZCS Azzurro portal delayed %.1f seconds", waited)
+        return waited
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def _dispatch(self) -> None:
+        """Hand out tokens to the queued requests as they are refilled."""
+        try:
+            while self._waiters:
+                self._refill()
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self._rate)
+                    continue
+
+                _, _, waiter = heapq.heappop(self._waiters)
+                # requests cancelled while queued give their turn away
+                if waiter.done():
+                    continue
+                self._tokens -= 1
+                waiter.set_result(None)
+        finally:
+            self._dispatcher = None
@@ -19,22 +19,26 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfTemperature,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-)
-from homeassistant.util import dt as dt_util
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import get_coordinator
-from .const import DOMAIN, MANUFACTURER, STATUS_ICON
+from .const import (
+    DATA_TAG_AWAITING_FIRST_SAMPLE,
+    DATA_TAG_EFFICIENCY_DC,
+    DATA_TAG_FETCHED_AT,
+    DATA_TAG_POWER_AVERAGE_1H,
+    DATA_TAG_POWER_AVERAGE_15M,
+    DATA_TAG_POWER_PEAK_TODAY,
+    DATA_TAG_TEMPERATURE_MAX_TODAY,
+    STATUS_DATA_TAGS,
+)
+from .coordinator import ZCSDataUpdateCoordinator
+from .models import ZCSDataContext, ZCSSnapshot
 
 _LOGGER = logging.getLogger(__name__)
-API_USE_CACHED_FLAG = "_use_cached_result"
-CACHED_LIMIT = 5
 
 
 @dataclass
@@ -61,6 +65,7 @@ SENSOR_TYPES: Final[tuple[ZCSSensorDefinition, ...]] = (
             extra_attributes={
                 "last_update": None,
                 "first_update": None,
+                "last_fetch": None,
             },
         ),
     ),
@@ -379,6 +384,65 @@ SENSOR_TYPES: Final[tuple[ZCSSensorDefinition, ...]] = (
             icon="mdi:solar-power-variant-outline",
         ),
     ),
+    ZCSSensorDefinition(
+        description=ZCSSensorDescription(
+            key="power_generating_average_15m",
+            data_tag=DATA_TAG_POWER_AVERAGE_15M,
+            device_class=SensorDeviceClass.POWER,
+            translation_key="power_generating_average_15m",
+            native_unit_of_measurement=UnitOfPower.WATT,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:solar-power-variant",
+            entity_registry_enabled_default=False,
+        ),
+    ),
+    ZCSSensorDefinition(
+        description=ZCSSensorDescription(
+            key="power_generating_average_1h",
+            data_tag=DATA_TAG_POWER_AVERAGE_1H,
+            device_class=SensorDeviceClass.POWER,
+            translation_key="power_generating_average_1h",
+            native_unit_of_measurement=UnitOfPower.WATT,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:solar-power-variant",
+            entity_registry_enabled_default=False,
+        ),
+    ),
+    ZCSSensorDefinition(
+        description=ZCSSensorDescription(
+            key="power_generating_peak_today",
+            data_tag=DATA_TAG_POWER_PEAK_TODAY,
+            device_class=SensorDeviceClass.POWER,
+            translation_key="power_generating_peak_today",
+            native_unit_of_measurement=UnitOfPower.WATT,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:solar-power-variant",
+            entity_registry_enabled_default=False,
+        ),
+    ),
+    ZCSSensorDefinition(
+        description=ZCSSensorDescription(
+            key="dc_efficiency",
+            data_tag=DATA_TAG_EFFICIENCY_DC,
+            translation_key="dc_efficiency",
+            native_unit_of_measurement=PERCENTAGE,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:sine-wave",
+            entity_registry_enabled_default=False,
+        ),
+    ),
+    ZCSSensorDefinition(
+        description=ZCSSensorDescription(
+            key="temperature_max_today",
+            data_tag=DATA_TAG_TEMPERATURE_MAX_TODAY,
+            device_class=SensorDeviceClass.TEMPERATURE,
+            translation_key="temperature_max_today",
+            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:thermometer-high",
+            entity_registry_enabled_default=False,
+        ),
+    ),
 )
 
 
@@ -400,6 +464,30 @@ async def async_setup_entry(
     async_add_entities(entities)
 
 
+def _rendered_data_tags(
+    description: ZCSSensorDescription, is_status: bool
+) -> frozenset[str]:
+    """Return the data tags the state and attributes of a sensor depend on."""
+    if is_status:
+        # the status sensor shows the update times as attributes
+        return frozenset(
+            (*STATUS_DATA_TAGS, "lastUpdate", "thingFind", DATA_TAG_FETCHED_AT)
+        )
+
+    if _resets_daily(description):
+        return frozenset((description.data_tag, DATA_TAG_AWAITING_FIRST_SAMPLE))
+
+    return frozenset((description.data_tag,))
+
+
+def _resets_daily(description: ZCSSensorDescription) -> bool:
+    """Return True for the energy counters restarting at local midnight."""
+    return (
+        description.device_class == SensorDeviceClass.ENERGY
+        and description.state_class == SensorStateClass.TOTAL_INCREASING
+    )
+
+
 class ZCSSensor(CoordinatorEntity, SensorEntity):
     """Representation of a Sensor."""
 
@@ -407,68 +495,70 @@ class ZCSSensor(CoordinatorEntity, SensorEntity):
 
     def __init__(
         self,
-        coordinator: DataUpdateCoordinator,
+        coordinator: ZCSDataUpdateCoordinator,
         idx,
         thing_key,
         description: ZCSSensorDescription,
     ):
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._idx = idx
+        self._is_status = description.data_tag is None and description.key == "status"
+        self._resets_daily = _resets_daily(description)
+        super().__init__(
+            coordinator,
+            ZCSDataContext(
+                thing_key, _rendered_data_tags(description, self._is_status)
+            ),
+        )
         self._thing_key = thing_key
+        self._device = coordinator.async_get_device(thing_key)
         self.entity_description = description
         self._attr_has_entity_name = True
         self._attr_unique_id = f"{self.entity_description.key}-{self._thing_key}"
-        self._redacted_unique_id = f"{self.entity_description.key}-{self._thing_key[:3]}*****{self._thing_key[-3:]}"
-        self._cached_data = None
-        self._cached_counter = 0
-        self._cached_attrs = {}
-        self._last_update = None
+        self._last_rendered = None
         _LOGGER.debug("init sensor %s", self._redacted_unique_id)
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, self._thing_key)},
-            name=self._thing_key,
-            manufacturer=MANUFACTURER,
+        self._attr_device_info = self._device.device_info
+
+    async def async_added_to_hass(self) -> None:
+        """Request the data read by the entity when added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_data_tags(
+                self._thing_key,
+                STATUS_DATA_TAGS
+                if self._is_status
+                else (self.entity_description.data_tag,),
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the rendered state or attributes changed."""
+        attrs = self.extra_state_attributes
+        rendered = (
+            self.available,
+            self.native_value,
+            self.icon,
+            self.assumed_state,
+            None if attrs is None else dict(attrs),
         )
+        if rendered == self._last_rendered:
+            return
+
+        self._last_rendered = rendered
+        self.async_write_ha_state()
 
     @property
     def native_value(self):
         """Return the state of the sensor."""
 
-        value = self._read_api_value()
-        use_cached_result = self._use_cached_value()
-
-        # return None/cached result when there is not the required key
-        if value is None and use_cached_result:
-            self._cached_counter = self._cached_counter + 1
-            return self._cached_data
-        elif value is None:
-            return None
-
-        # reset cache data counter after error handling (no value from API)
-        self._cached_counter = 0
-
-        # return cached result when last update is not the last observed update
-        if self._is_out_of_date():
-            return self._cached_data
-
-        # cache data for next API update
-        self._cached_data = value
-        self._last_update = (
-            None
-            if self._read_last_update() is None
-            else dt_util.parse_datetime(self._read_last_update())
-        )
-
-        # by default, return raw value from the coordinator data
-        return value
+        # the device keeps the values of the last observed update when
+        # the coordinator data is out of date
+        return self._read_api_value()
 
     @property
     def assumed_state(self) -> bool:
         """Return True if unable to access real state of the entity."""
-        value = self._read_api_value()
-        use_cached_result = self._use_cached_value()
-        return value is None and use_cached_result
+        return self.coordinator.data[self._thing_key].is_cached
 
     @property
     def available(self):
@@ -483,134 +573,42 @@ class ZCSSensor(CoordinatorEntity, SensorEntity):
     def extra_state_attributes(self):
         """Return extra state attributes of the entity."""
 
-        # return cached result when last update is not the last observed update
-        if self._is_out_of_date():
-            return self._cached_attrs
-
-        attr = {}
-        if self.entity_description.extra_attributes is not None:
-            attr = self.entity_description.extra_attributes
-
-            if "last_update" in self.entity_description.extra_attributes:
-                attr["last_update"] = self._read_last_update()
-
-            if "first_update" in self.entity_description.extra_attributes:
-                attr["first_update"] = self._read_first_update()
-
-        attr["serial"] = self._thing_key
-        self._cached_attrs = attr
+        if self.entity_description.extra_attributes is None:
+            return self._device.serial_attributes
 
-        return attr
+        # attributes are rendered once per update by the device, and shared
+        attributes = self._device.attributes
+        return {
+            key: attributes[key]
+            for key in (*self.entity_description.extra_attributes, "serial")
+        }
 
     @property
     def icon(self) -> str | None:
         """Return the icon to use in the frontend, if any."""
-        if (
-            self.entity_description.data_tag is None
-            and self.entity_description.key == "status"
-        ):
-            status_icon = STATUS_ICON.get(self._read_status())
-            if status_icon is not None:
-                return status_icon
+        if self._is_status and self._snapshot.status_icon is not None:
+            return self._snapshot.status_icon
 
         return super().icon
 
-    def _read_api_value(self):
-        # status sensors have a special function based on observed values
-        if (
-            self.entity_description.data_tag is None
-            and self.entity_description.key == "status"
-        ):
-            return self._read_status()
-
-        value = self.coordinator.data[self._thing_key].get(
-            self.entity_description.data_tag
-        )
-
-        # on total increasing sensors, force value to 0 at start of local day until first value is shown
-        # by ZCS device to avoid messing up energy stats
-        if (
-            self.entity_description.device_class == SensorDeviceClass.ENERGY
-            and self.entity_description.state_class == SensorStateClass.TOTAL_INCREASING
-            and self._read_last_update() is not None
-        ):
-            last_update = (
-                None
-                if self._read_last_update() is None
-                else dt_util.parse_datetime(self._read_last_update())
-            )
-            start_of_day = dt_util.start_of_local_day()
-            if last_update is not None and start_of_day > last_update:
-                _LOGGER.debug(
-                    "%s: last seen ZCS device at %s, start of day is at %s, forcing energy measurement to 0 to reset cycle",
-                    self._redacted_unique_id,
-                    last_update,
-                    start_of_day,
-                )
-                return 0
-
-        return value
-
-    def _use_cached_value(self):
-        return (
-            self.coordinator.data[self._thing_key].get(API_USE_CACHED_FLAG)
-            and self._cached_counter < CACHED_LIMIT
-            and self._cached_data is not None
-        )
-
-    def _is_out_of_date(self):
-        last_update = (
-            None
-            if self._read_last_update() is None
-            else dt_util.parse_datetime(self._read_last_update())
-        )
-        return (
-            last_update is not None
-            and self._last_update is not None
-            and last_update < self._last_update
-        )
-
-    def _read_status(self):
-        if self.coordinator.data[self._thing_key].get("thingFind") is None:
-            return None
-
-        power_generating = self.coordinator.data[self._thing_key].get("powerGenerating")
-        power_consuming = self.coordinator.data[self._thing_key].get("powerConsuming")
-        power_autoconsuming = self.coordinator.data[self._thing_key].get(
-            "powerAutoconsuming"
-        )
-
-        is_connected = (
-            power_generating is not None
-            or power_consuming is not None
-            or power_autoconsuming is not None
-        )
-        is_generating = power_generating is not None and power_generating > 0
-        is_consuming = power_consuming is not None and power_consuming > 0
-        is_autoconsuming = power_autoconsuming is not None and power_autoconsuming > 0
-
-        if is_generating and is_consuming:
-            return "generating_consuming_from_network"
-
-        if is_generating and is_autoconsuming:
-            return "generating_consuming_from_produced"
-
-        if is_generating:
-            return "generating"
-
-        if is_consuming:
-            return "consuming_from_network"
+    @property
+    def _snapshot(self) -> ZCSSnapshot:
+        return self._device.snapshot
 
-        if is_autoconsuming:
-            return "consuming_from_produced"
+    @property
+    def _redacted_unique_id(self) -> str:
+        return f"{self.entity_description.key}-{self._device.redacted_thing_key}"
 
-        if not is_connected:
-            return "not_connected"
+    def _read_api_value(self):
+        snapshot = self._snapshot
 
-        return "off"
+        # status sensors read the status derived from observed values on update
+        if self._is_status:
+            return snapshot.status
 
-    def _read_last_update(self):
-        return self.coordinator.data[self._thing_key].get("lastUpdate")
+        # on total increasing sensors, force value to 0 from local midnight until first value of the day
+        # is shown by ZCS device to avoid messing up energy stats
+        if self._resets_daily and self._device.awaiting_first_sample:
+            return 0
 
-    def _read_first_update(self):
-        return self.coordinator.data[self._thing_key].get("thingFind")
+        return snapshot.get(self.entity_description.data_tag)
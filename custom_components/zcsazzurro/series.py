@@ -0,0 +1,129 @@
+"""Time series of the historic samples of ZCS Azzurro devices."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from itertools import compress
+import math
+from operator import add, eq
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_TAG_EFFICIENCY_DC,
+    DATA_TAG_POWER_AVERAGE_1H,
+    DATA_TAG_POWER_AVERAGE_15M,
+    DATA_TAG_POWER_PEAK_TODAY,
+    DATA_TAG_TEMPERATURE_MAX_TODAY,
+)
+
+SERIES_VALUES = ("powerGenerating", "powerDC", "temperature")
+
+SHORT_WINDOW = 900
+LONG_WINDOW = 3600
+
+
+class ZCSTimeSeries:
+    """Keep the historic samples of a device since the start of the local day.
+
+    Samples are stored in an array of timestamps shared by one array of
+    measurements per value, holding NaN for missing measurements, so that
+    each window is the same positional slice of every value, found by
+    bisection and aggregated by builtins instead of Python loops.
+    """
+
+    __slots__ = ("_ts", "_values")
+
+    def __init__(self) -> None:
+        """Initialize the empty series."""
+        self._ts = array("d")
+        self._values = {name: array("d") for name in SERIES_VALUES}
+
+    def extend(self, historic_data: dict) -> None:
+        """Append the samples newer than the last stored one."""
+        timestamps = historic_data.get("ts", [])
+        last_ts = self._ts[-1] if self._ts else float("-inf")
+
+        # requested windows overlap: only the samples after the last stored
+        # one are parsed, walking back from the newest
+        new_samples: list[tuple[int, float]] = []
+        idx = len(timestamps)
+        while idx > 0:
+            idx -= 1
+            sample_ts = timestamps[idx]
+            parsed = None if sample_ts is None else dt_util.parse_datetime(sample_ts)
+            if parsed is None:
+                continue
+            if parsed.timestamp() <= last_ts:
+                break
+            new_samples.append((idx, parsed.timestamp()))
+        new_samples.reverse()
+
+        columns = {name: historic_data.get(name) or [] for name in SERIES_VALUES}
+        for idx, timestamp in new_samples:
+            if timestamp <= last_ts:
+                continue
+            self._ts.append(timestamp)
+            for name, column in columns.items():
+                value = column[idx] if idx < len(column) else None
+                self._values[name].append(math.nan if value is None else value)
+            last_ts = timestamp
+
+    def aggregates(self, now: datetime) -> dict[str, float | None]:
+        """Return the values derived from the samples, dropping the expired ones."""
+        now_ts = now.timestamp()
+        start_of_day = dt_util.start_of_local_day(dt_util.as_local(now)).timestamp()
+        self._trim(min(start_of_day, now_ts - LONG_WINDOW))
+
+        short_idx = bisect_left(self._ts, now_ts - SHORT_WINDOW)
+        long_idx = bisect_left(self._ts, now_ts - LONG_WINDOW)
+        day_idx = bisect_left(self._ts, start_of_day)
+
+        power_short = self._values["powerGenerating"][short_idx:]
+        power_dc_short = self._values["powerDC"][short_idx:]
+        power_long = _present(self._values["powerGenerating"][long_idx:])
+        power_today = _present(self._values["powerGenerating"][day_idx:])
+        temperature_today = _present(self._values["temperature"][day_idx:])
+
+        # samples may miss either power, so the ratio is taken on paired ones:
+        # their sum is NaN when either is missing
+        sums = array("d", map(add, power_short, power_dc_short))
+        paired = list(map(eq, sums, sums))
+        power_paired = math.fsum(compress(power_short, paired))
+        power_dc_paired = math.fsum(compress(power_dc_short, paired))
+
+        return {
+            DATA_TAG_POWER_AVERAGE_15M: _mean(_present(power_short)),
+            DATA_TAG_POWER_AVERAGE_1H: _mean(power_long),
+            DATA_TAG_POWER_PEAK_TODAY: (
+                round(max(power_today), 1) if power_today else None
+            ),
+            DATA_TAG_EFFICIENCY_DC: (
+                round(power_paired / power_dc_paired * 100, 1)
+                if power_dc_paired > 0
+                else None
+            ),
+            DATA_TAG_TEMPERATURE_MAX_TODAY: (
+                round(max(temperature_today), 1) if temperature_today else None
+            ),
+        }
+
+    def _trim(self, start: float) -> None:
+        idx = bisect_left(self._ts, start)
+        del self._ts[:idx]
+        for values in self._values.values():
+            del values[:idx]
+
+
+def _present(values: array) -> array:
+    """Return the measurements of a window which are not missing."""
+    # the sum of a window is NaN only when a measurement is missing, and NaN
+    # is the only value not equal to itself
+    if not math.isnan(sum(values)):
+        return values
+    return array("d", compress(values, map(eq, values, values)))
+
+
+def _mean(values: array) -> float | None:
+    return round(sum(values) / len(values), 1) if values else None
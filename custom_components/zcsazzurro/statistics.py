@@ -0,0 +1,211 @@
+"""Import of ZCS Azzurro historic data into long-term statistics."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util, slugify
+
+from .api import ZCSPortal
+from .const import (
+    API_STATISTICS_CHUNK,
+    API_STATISTICS_LAG,
+    API_STATISTICS_MAX_GAP,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+
+
+class ZCSStatisticsImporter:
+    """Write hourly statistics of a device from portal historic data.
+
+    Generated power and energy are imported as external statistics, in
+    chunks of API_STATISTICS_CHUNK seconds, so that the energy dashboard does
+    not depend on the polls stored by the recorder. Every completed hour is
+    imported by the first update API_STATISTICS_LAG seconds after its end,
+    and each import also fills the gaps left by outages.
+
+    The last hour holding samples and the following ones are imported again
+    at the next import, in case the datalogger uploads their samples late.
+    """
+
+    def __init__(self, hass: HomeAssistant, portal: ZCSPortal, thing_key: str) -> None:
+        """Initialize the importer."""
+        self._hass = hass
+        self._portal = portal
+        self._thing_key = thing_key
+        self._imported_until: datetime | None = None
+        self._checked_until: datetime | None = None
+        self._task: asyncio.Task | None = None
+        self.energy_statistic_id = (
+            f"{DOMAIN}:{slugify(thing_key)}_energy_generating_total"
+        )
+        self.power_statistic_id = f"{DOMAIN}:{slugify(thing_key)}_power_generating"
+
+    @callback
+    def async_handle_update(self) -> None:
+        """Import the hours completed since the last import, in background."""
+        if "recorder" not in self._hass.config.components or self._task is not None:
+            return
+
+        # the import would fail while the portal is not requested
+        if self._portal.retry_after > 0:
+            return
+
+        # the portal receives the samples of an hour a few minutes after it
+        current_hour = _start_of_hour(
+            dt_util.utcnow() - timedelta(seconds=API_STATISTICS_LAG)
+        )
+        if self._checked_until is not None and self._checked_until >= current_hour:
+            return
+
+        self._task = self._hass.async_create_background_task(
+            self._async_fill_gap(current_hour), f"{DOMAIN} statistics import"
+        )
+
+    async def _async_fill_gap(self, end: datetime) -> None:
+        try:
+            if self._imported_until is None:
+                self._imported_until = await self._async_get_last_imported()
+
+            start = end - timedelta(seconds=API_STATISTICS_MAX_GAP)
+            if self._imported_until is not None:
+                start = max(start, self._imported_until - HOUR)
+            if await self.async_import(start, end):
+                self._checked_until = end
+        finally:
+            self._task = None
+
+    async def async_import(self, start: datetime, end: datetime) -> bool:
+        """Import the statistics of the hours between two dates.
+
+        Return False if the portal failed before every hour was fetched.
+        """
+        start = _start_of_hour(start)
+        end = _start_of_hour(end)
+        chunk = timedelta(seconds=API_STATISTICS_CHUNK)
+
+        while start < end:
+            chunk_end = min(start + chunk, end)
+            historic_data = await self._portal.fetch_historic_data(
+                self._thing_key, start, chunk_end
+            )
+            if historic_data is None:
+                _LOGGER.warning(
+                    "Unable to import statistics from %s, will retry later", start
+                )
+                return False
+
+            imported_until = self._async_add_statistics(historic_data, chunk_end)
+            if imported_until is not None and (
+                self._imported_until is None or self._imported_until < imported_until
+            ):
+                self._imported_until = imported_until
+            start = chunk_end
+        return True
+
+    @callback
+    def _async_add_statistics(
+        self, historic_data: dict, end: datetime
+    ) -> datetime | None:
+        """Aggregate historic samples per hour and add them to the recorder.
+
+        Samples of the hour starting at end are skipped, as it is not complete.
+        Return the end of the last hour holding samples, None without samples.
+        """
+        power: dict[datetime, list[float]] = {}
+        energy: dict[datetime, float] = {}
+
+        for ts, power_generating, energy_total in zip(
+            historic_data.get("ts", []),
+            historic_data.get("powerGenerating", []),
+            historic_data.get("energyGeneratingTotal", []),
+        ):
+            sample_ts = None if ts is None else dt_util.parse_datetime(ts)
+            if sample_ts is None:
+                continue
+            hour = _start_of_hour(sample_ts)
+            if hour >= end:
+                continue
+            if power_generating is not None:
+                power.setdefault(hour, []).append(power_generating)
+            if energy_total is not None:
+                energy[hour] = energy_total
+
+        if power:
+            async_add_external_statistics(
+                self._hass,
+                StatisticMetaData(
+                    has_mean=True,
+                    has_sum=False,
+                    name=f"{self._thing_key} generating power",
+                    source=DOMAIN,
+                    statistic_id=self.power_statistic_id,
+                    unit_of_measurement=UnitOfPower.WATT,
+                ),
+                [
+                    StatisticData(
+                        start=hour,
+                        mean=sum(values) / len(values),
+                        min=min(values),
+                        max=max(values),
+                    )
+                    for hour, values in sorted(power.items())
+                ],
+            )
+
+        if energy:
+            # the total generated energy never resets, so it is also the sum
+            async_add_external_statistics(
+                self._hass,
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=f"{self._thing_key} generated energy",
+                    source=DOMAIN,
+                    statistic_id=self.energy_statistic_id,
+                    unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                ),
+                [
+                    StatisticData(start=hour, state=total, sum=total)
+                    for hour, total in sorted(energy.items())
+                ],
+            )
+
+        if not power and not energy:
+            return None
+        return max(power.keys() | energy.keys()) + HOUR
+
+    async def _async_get_last_imported(self) -> datetime | None:
+        """Return the end of the last hour already imported."""
+        last_stats = await get_instance(self._hass).async_add_executor_job(
+            get_last_statistics,
+            self._hass,
+            1,
+            self.energy_statistic_id,
+            False,
+            {"sum"},
+        )
+        if not last_stats.get(self.energy_statistic_id):
+            return None
+
+        start = last_stats[self.energy_statistic_id][0]["start"]
+        if isinstance(start, datetime):
+            return start + HOUR
+        return dt_util.utc_from_timestamp(start) + HOUR
+
+
+def _start_of_hour(value: datetime) -> datetime:
+    return dt_util.as_utc(value).replace(minute=0, second=0, microsecond=0)
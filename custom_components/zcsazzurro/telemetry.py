@@ -0,0 +1,67 @@
+"""Poll performance telemetry for the ZCS Azzurro integration."""
+from __future__ import annotations
+
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+from typing import Any
+
+from .const import API_METRICS_SIZE
+
+
+class ZCSMetrics:
+    """Keep rolling windows of the last measurements of each metric.
+
+    Timings and sizes are summarized as percentiles, events (like the outcome
+    of a request) as the number of occurrences in the window.
+    """
+
+    def __init__(self, size: int = API_METRICS_SIZE) -> None:
+        """Initialize the metrics."""
+        self._size = size
+        self._samples: dict[str, deque[float]] = {}
+        self._events: dict[str, deque[str]] = {}
+
+    def record(self, name: str, value: float) -> None:
+        """Record a measurement."""
+        if name not in self._samples:
+            self._samples[name] = deque(maxlen=self._size)
+        self._samples[name].append(value)
+
+    def count(self, name: str, event: str) -> None:
+        """Record the occurrence of an event."""
+        if name not in self._events:
+            self._events[name] = deque(maxlen=self._size)
+        self._events[name].append(event)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Record the seconds spent in a block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the summary of all the metrics."""
+        summary: dict[str, Any] = {}
+        for name, samples in self._samples.items():
+            values = sorted(samples)
+            summary[name] = {
+                "count": len(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+                "max": values[-1],
+            }
+        for name, events in self._events.items():
+            summary[name] = dict(Counter(events))
+        return summary
+
+
+def _percentile(values: list[float], percentile: int) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    rank = max(0, -(-len(values) * percentile // 100) - 1)
+    return values[rank]